@@ -0,0 +1,307 @@
+"""Headless loading, cleaning and metric computation for the three report types.
+
+Nothing here imports Streamlit or Plotly, so the same code backs the
+dashboard pages and the batch command line (``batch.py``).
+"""
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from categorical import encode_categoricals, observed_values, value_counts_codes
+from coerce import coerce_columns
+from cube import OrderCube
+from ingest import load_data, read_header
+from instrument import stage
+from query import FilterEngine
+
+ORDER_COLUMNS = ["purchase-date", "order-status", "fulfillment-channel", "item-price", "ship-city", "sku", "product-name"]
+ORDER_FILTER_COLUMNS = ["order-status", "fulfillment-channel"]
+# Columns parsed from an order upload: the dashboard's plus those the SKU
+# return rate join needs, so both pages share one typed copy and one parse
+ORDER_LOAD_COLUMNS = ORDER_COLUMNS + ["amazon-order-id", "quantity"]
+
+# Columns the return dashboard reads after cleaning
+RETURN_COLUMNS = ["order date", "return request date", "return request status", "return reason",
+                  "refunded amount", "order amount", "merchant sku", "item name"]
+RETURN_FILTER_COLUMNS = ["return request status", "return reason"]
+RETURN_DATE_COLUMNS = ["order date", "return request date", "return delivery date", "safet claim creation time"]
+RETURN_NUMERIC_COLUMNS = ["refunded amount", "order amount"]
+
+INVENTORY_COLUMNS = ["sku", "asin", "price", "quantity"]
+
+# Columns each dashboard reads, and those its cleaner cannot do without
+REPORT_COLUMNS = {"order": ORDER_COLUMNS, "return": RETURN_COLUMNS, "inventory": INVENTORY_COLUMNS}
+REQUIRED_COLUMNS = {"order": ORDER_COLUMNS, "return": [], "inventory": INVENTORY_COLUMNS}
+
+TOP_N = 10
+
+
+def clean_order_report(df):
+    """Validates an order report and converts its date columns."""
+    missing_columns = [col for col in ORDER_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+
+    # Convert Date Columns to Datetime (with inferred formats) and Remove Timezone
+    coerce_columns(df, dates=["purchase-date", "last-updated-date"], naive=True)
+
+    # Dictionary-encode the repeated string columns
+    return encode_categoricals(df, "order")
+
+
+def clean_return_report(df):
+    """Standardizes return report column names and converts dates and amounts."""
+    # Standardize Column Names
+    df.columns = df.columns.str.strip().str.lower()
+
+    # Convert date and numeric columns concurrently, counting values that could not be read
+    coerce_columns(df, dates=RETURN_DATE_COLUMNS, numbers=RETURN_NUMERIC_COLUMNS)
+    for col in RETURN_NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna(0)
+
+    # Dictionary-encode the repeated string columns
+    return encode_categoricals(df, "return")
+
+
+def clean_inventory(df):
+    """Keeps the required inventory columns and converts quantity and price."""
+    missing_columns = [col for col in INVENTORY_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"❌ Missing columns: {', '.join(missing_columns)}")
+
+    df = df[INVENTORY_COLUMNS].copy()
+    coerce_columns(df, numbers=["quantity", "price"])
+    df["quantity"] = df["quantity"].fillna(0).astype(int)
+    df["price"] = df["price"].fillna(0)
+
+    # Dictionary-encode SKU/ASIN when they repeat enough to pay off
+    return encode_categoricals(df, "inventory")
+
+
+CLEANERS = {"order": clean_order_report, "return": clean_return_report, "inventory": clean_inventory}
+
+
+def _counts_records(counts):
+    return [{"value": str(value), "count": int(count)} for value, count in counts.items()]
+
+
+def _daily_records(daily, date_column, value_column):
+    return [{"date": str(day), "count": int(count)} for day, count in zip(daily[date_column], daily[value_column])]
+
+
+@dataclass
+class OrderSummary:
+    total_orders: int
+    total_revenue: float
+    cancelled_orders: int
+    orders_by_date: pd.DataFrame
+    top_cities: pd.Series
+    top_products: pd.Series
+    top_skus: pd.Series
+
+    def to_dict(self):
+        return {
+            "total_orders": self.total_orders,
+            "total_revenue": self.total_revenue,
+            "cancelled_orders": self.cancelled_orders,
+            "orders_by_date": _daily_records(self.orders_by_date, "purchase-date", "Orders"),
+            "top_cities": _counts_records(self.top_cities),
+            "top_products": _counts_records(self.top_products),
+            "top_skus": _counts_records(self.top_skus),
+        }
+
+
+@dataclass
+class ReturnSummary:
+    total_returns: int
+    total_refunded_amount: float
+    total_order_amount: float
+    returns_by_date: pd.DataFrame = None
+    top_reasons: pd.Series = None
+    top_skus: pd.Series = None
+    top_products: pd.Series = None
+
+    def to_dict(self):
+        result = {
+            "total_returns": self.total_returns,
+            "total_refunded_amount": self.total_refunded_amount,
+            "total_order_amount": self.total_order_amount,
+        }
+        if self.returns_by_date is not None:
+            result["returns_by_date"] = _daily_records(self.returns_by_date, "return request date", "Returns")
+        for name in ["top_reasons", "top_skus", "top_products"]:
+            if getattr(self, name) is not None:
+                result[name] = _counts_records(getattr(self, name))
+        return result
+
+
+@dataclass
+class InventorySummary:
+    total_inventory: int
+    total_value: int
+    avg_price: float
+    zero_stock_skus: int
+    available_skus: int
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+@dataclass
+class ReportResult:
+    """One processed report file, as written by the batch command line."""
+    path: str
+    kind: str
+    rows: int
+    metrics: dict = field(default_factory=dict)
+    error: str = None
+
+
+def order_filter_spec(order_status, fulfillment_channel, start_date, end_date):
+    """The FilterEngine spec of an order filter selection."""
+    return {
+        "order-status": order_status,
+        "fulfillment-channel": fulfillment_channel,
+        "purchase-date": (start_date, end_date),
+    }
+
+
+def summarize_orders(df, order_status=None, fulfillment_channel=None, start_date=None, end_date=None,
+                     cube=None, engine=None, top=TOP_N):
+    """Computes the order KPIs, daily series and top-N tables for a filter selection.
+
+    Filters left as None select everything. A prebuilt ``cube`` and
+    ``engine`` (as cached by the dashboard) are reused when given.
+    """
+    if order_status is None:
+        order_status = observed_values(df["order-status"])
+    if fulfillment_channel is None:
+        fulfillment_channel = observed_values(df["fulfillment-channel"])
+    if start_date is None:
+        start_date = df["purchase-date"].min()
+    if end_date is None:
+        end_date = df["purchase-date"].max()
+
+    # Metrics and daily orders come from the cube; only top-N needs the rows
+    with stage("aggregate") as record:
+        cube = cube or OrderCube.build(df)
+        cube_slice = cube.query(order_status, fulfillment_channel, start_date, end_date)
+        record["rows"] = len(cube.cells)
+
+    with stage("filter") as record:
+        engine = engine or FilterEngine(df, ORDER_FILTER_COLUMNS, ["purchase-date"])
+        filtered_df = engine.filter(df, order_filter_spec(order_status, fulfillment_channel, start_date, end_date))
+        record["rows"] = len(filtered_df)
+
+    with stage("top-n") as record:
+        top_cities = value_counts_codes(filtered_df["ship-city"]).head(top)
+        top_products = value_counts_codes(filtered_df["product-name"]).head(top)
+        top_skus = value_counts_codes(filtered_df["sku"]).head(top)
+        record["rows"] = len(filtered_df)
+
+    return OrderSummary(
+        cube_slice.total_orders,
+        cube_slice.total_revenue,
+        cube_slice.cancelled_orders,
+        cube_slice.orders_by_date,
+        top_cities,
+        top_products,
+        top_skus,
+    )
+
+
+def return_filter_spec(return_status=None, return_reason=None, start_date=None, end_date=None):
+    """The FilterEngine spec of a return filter selection; None (or empty) means no filter."""
+    return {
+        "return request status": return_status or None,
+        "return reason": return_reason or None,
+        "order date": (start_date, end_date) if start_date is not None and end_date is not None else None,
+    }
+
+
+def filter_returns(df, return_status=None, return_reason=None, start_date=None, end_date=None, engine=None):
+    """Returns the rows matching the return filters; None (or empty) means no filter."""
+    with stage("filter") as record:
+        engine = engine or FilterEngine(df, RETURN_FILTER_COLUMNS, ["order date"])
+        filtered_df = engine.filter(df, return_filter_spec(return_status, return_reason, start_date, end_date))
+        record["rows"] = len(filtered_df)
+    return filtered_df
+
+
+def summarize_returns(filtered_df, top=TOP_N):
+    """Computes the return KPIs, daily series and top-N tables for already filtered rows."""
+    with stage("aggregate", rows=len(filtered_df)):
+        return _summarize_returns(filtered_df, top)
+
+
+def _summarize_returns(filtered_df, top):
+    summary = ReturnSummary(
+        filtered_df.shape[0],
+        float(filtered_df["refunded amount"].sum()) if "refunded amount" in filtered_df.columns else 0,
+        float(filtered_df["order amount"].sum()) if "order amount" in filtered_df.columns else 0,
+    )
+    if "return request date" in filtered_df.columns:
+        summary.returns_by_date = filtered_df.groupby(filtered_df["return request date"].dt.date).size().reset_index(name="Returns")
+    if "return reason" in filtered_df.columns:
+        summary.top_reasons = value_counts_codes(filtered_df["return reason"]).head(top)
+    if "merchant sku" in filtered_df.columns:
+        summary.top_skus = value_counts_codes(filtered_df["merchant sku"]).head(top)
+    if "item name" in filtered_df.columns:
+        summary.top_products = value_counts_codes(filtered_df["item name"]).head(top)
+    return summary
+
+
+def summarize_inventory(df):
+    """Computes the inventory KPIs."""
+    with stage("aggregate", rows=len(df)):
+        return InventorySummary(
+            int(df["quantity"].sum()),
+            int((df["price"] * df["quantity"]).sum()),
+            round(float(df["price"].mean()), 2),
+            int((df["quantity"] == 0).sum()),
+            int((df["quantity"] > 0).sum()),
+        )
+
+
+def detect_report_kind(columns):
+    """Guesses the report type from raw column names, or returns None."""
+    columns = set(columns)
+    normalized = {str(col).strip().lower() for col in columns}
+    if set(ORDER_COLUMNS) <= columns:
+        return "order"
+    if {"return request date", "return reason"} <= normalized or "return request status" in normalized:
+        return "return"
+    if set(INVENTORY_COLUMNS) <= columns:
+        return "inventory"
+    return None
+
+
+def missing_columns(columns, kind):
+    """Returns the columns a report of ``kind`` requires that ``columns`` lacks."""
+    columns = set(columns)
+    return [col for col in REQUIRED_COLUMNS[kind] if col not in columns]
+
+
+def process_report_file(path, kind=None):
+    """Loads, cleans and summarizes one report file into a ReportResult.
+
+    The report type is detected from the header row alone, and only the
+    columns its summary reads are parsed.
+    """
+    try:
+        kind = kind or detect_report_kind(read_header(path))
+        if kind is None:
+            return ReportResult(str(path), "unknown", 0, error="Unrecognized report columns")
+
+        df = CLEANERS[kind](load_data(path, REPORT_COLUMNS[kind]))
+        if kind == "order":
+            summary = summarize_orders(df)
+        elif kind == "return":
+            summary = summarize_returns(df)
+        else:
+            summary = summarize_inventory(df)
+        return ReportResult(str(path), kind, len(df), summary.to_dict())
+
+    except Exception as e:
+        return ReportResult(str(path), kind or "unknown", 0, error=str(e))
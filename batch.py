@@ -0,0 +1,80 @@
+"""Process a directory of order/return/inventory exports into metric summaries.
+
+Example:
+    python batch.py exports/ --output summaries.json --workers 8
+    python batch.py exports/ --output summaries.parquet
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+import pandas as pd
+
+from analytics import process_report_file
+
+REPORT_EXTENSIONS = (".csv", ".xlsx")
+
+
+def find_reports(directory, recursive=False):
+    """Returns the report files in ``directory``, sorted by path."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(REPORT_EXTENSIONS))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def run_batch(paths, workers=None, kind=None):
+    """Summarizes every report across a process pool, returning ReportResults in input order."""
+    if workers == 1:
+        return [process_report_file(path, kind) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(process_report_file, paths, [kind] * len(paths)))
+
+
+def write_results(results, output):
+    """Writes the results as JSON, or as Parquet with nested metrics stored as JSON text."""
+    records = [asdict(result) for result in results]
+    if output.endswith(".parquet"):
+        rows = []
+        for record in records:
+            row = {key: value for key, value in record.items() if key != "metrics"}
+            for name, value in record["metrics"].items():
+                row[name] = json.dumps(value) if isinstance(value, (list, dict)) else value
+            rows.append(row)
+        pd.DataFrame(rows).to_parquet(output, index=False)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute dashboard metrics for a directory of Amazon report exports.")
+    parser.add_argument("directory", help="Directory containing .csv/.xlsx report exports")
+    parser.add_argument("-o", "--output", default="summaries.json", help="Output file (.json or .parquet)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also process subdirectories")
+    parser.add_argument("--kind", choices=["order", "return", "inventory"], help="Skip detection and treat every file as this report type")
+    args = parser.parse_args(argv)
+
+    paths = find_reports(args.directory, args.recursive)
+    if not paths:
+        print(f"No report files found in {args.directory}", file=sys.stderr)
+        return 1
+
+    results = run_batch(paths, args.workers, args.kind)
+    write_results(results, args.output)
+
+    failed = [result for result in results if result.error]
+    print(f"Processed {len(results) - len(failed)}/{len(results)} reports -> {args.output}")
+    for result in failed:
+        print(f"  {result.path}: {result.error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Time and memory-profile each stage of the three dashboard flows at scale.
+
+Generates synthetic reports (see ``synth.py``), then runs the read, type
+conversion, filter, aggregate and chart-build stages for each size and
+records wall time, peak traced memory and row counts. Stages are timed in
+a pass without tracemalloc, which slows allocation-heavy stages several
+times over, and memory is measured in a second pass. Results are saved as
+JSON so a later run can be compared against them. Examples:
+    python bench.py --sizes 10000 100000 1000000
+    python bench.py --kind order --sizes 100000 --compare bench_results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+import charts
+from analytics import (
+    CLEANERS, ORDER_FILTER_COLUMNS, RETURN_FILTER_COLUMNS,
+    filter_returns, summarize_inventory, summarize_orders, summarize_returns,
+)
+from categorical import observed_values
+from cube import OrderCube
+from ingest import load_data
+from query import FilterEngine
+from synth import XLSX_MAX_ROWS, generate_report
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# Writing and reading xlsx through openpyxl is slow, so large sizes are CSV only by default
+DEFAULT_XLSX_MAX_ROWS = 100_000
+
+
+class StageTimer:
+    """Records wall time, peak traced memory and row count for named stages."""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def run(self, name, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak_mb = None
+        if self.trace_memory:
+            peak_mb = (tracemalloc.get_traced_memory()[1] - baseline) / 2**20
+            tracemalloc.stop()
+        rows = len(result) if isinstance(result, (pd.DataFrame, pd.Series)) else None
+        self.stages.append({"stage": name, "seconds": round(seconds, 4),
+                            "peak_mb": round(peak_mb, 2) if peak_mb is not None else None, "rows_out": rows})
+        return result
+
+
+def _first_half(values):
+    return values[: max(1, len(values) // 2)]
+
+
+def _figures_json(*figures):
+    """Builds the figures' JSON payloads, as Streamlit does when sending them to the browser."""
+    return sum(len(fig.to_json()) for fig in figures)
+
+
+def bench_order(timer, path):
+    df = timer.run("read", load_data, path)
+    df = timer.run("convert", CLEANERS["order"], df)
+
+    def select():
+        engine = FilterEngine(df, ORDER_FILTER_COLUMNS, ["purchase-date"])
+        spec = {
+            "order-status": _first_half(observed_values(df["order-status"])),
+            "fulfillment-channel": observed_values(df["fulfillment-channel"]),
+            "purchase-date": (df["purchase-date"].min(), df["purchase-date"].min() + pd.Timedelta(days=30)),
+        }
+        return engine, spec, engine.filter(df, spec)
+
+    engine, spec, _ = timer.run("filter", select)
+    summary = timer.run("aggregate", lambda: summarize_orders(
+        df, spec["order-status"], spec["fulfillment-channel"], *spec["purchase-date"],
+        cube=OrderCube.build(df), engine=engine,
+    ))
+    timer.run("chart", lambda: _figures_json(
+        charts.orders_over_time_figure(summary.orders_by_date),
+        charts.top_cities_figure(summary.top_cities),
+    ))
+
+
+def bench_return(timer, path):
+    df = timer.run("read", load_data, path)
+    df = timer.run("convert", CLEANERS["return"], df)
+    filtered_df = timer.run("filter", lambda: filter_returns(
+        df,
+        _first_half(observed_values(df["return request status"])),
+        _first_half(observed_values(df["return reason"])),
+        df["order date"].min(), df["order date"].min() + pd.Timedelta(days=30),
+        engine=FilterEngine(df, RETURN_FILTER_COLUMNS, ["order date"]),
+    ))
+    summary = timer.run("aggregate", summarize_returns, filtered_df)
+    timer.run("chart", lambda: _figures_json(
+        charts.returns_over_time_figure(summary.returns_by_date),
+        charts.top_reasons_figure(summary.top_reasons),
+    ))
+
+
+def bench_inventory(timer, path):
+    df = timer.run("read", load_data, path)
+    df = timer.run("convert", CLEANERS["inventory"], df)
+    timer.run("filter", lambda: df[df["quantity"] == 0])
+    summary = timer.run("aggregate", summarize_inventory, df)
+    timer.run("chart", lambda: _figures_json(
+        charts.stock_distribution_figure(summary.zero_stock_skus, summary.available_skus),
+    ))
+
+
+BENCHMARKS = {"order": bench_order, "return": bench_return, "inventory": bench_inventory}
+
+
+def run_benchmarks(kinds, sizes, formats, data_dir, xlsx_max_rows=DEFAULT_XLSX_MAX_ROWS, trace_memory=True):
+    """Runs every (kind, size, format) combination and returns one record per stage."""
+    records = []
+    for kind in kinds:
+        for n_rows in sizes:
+            for fmt in formats:
+                if fmt == "xlsx" and n_rows > min(xlsx_max_rows, XLSX_MAX_ROWS):
+                    continue
+                path = os.path.join(data_dir, f"{kind}_{n_rows}.{fmt}")
+                if not os.path.exists(path):
+                    generate_report(kind, n_rows, data_dir, fmt)
+
+                timer = StageTimer(trace_memory=False)
+                BENCHMARKS[kind](timer, path)
+                if trace_memory:
+                    traced = StageTimer(trace_memory=True)
+                    BENCHMARKS[kind](traced, path)
+                    for stage, traced_stage in zip(timer.stages, traced.stages):
+                        stage["peak_mb"] = traced_stage["peak_mb"]
+                for stage in timer.stages:
+                    records.append({"kind": kind, "rows": n_rows, "format": fmt, **stage})
+                    print(f"{kind:<9} {n_rows:>10,} {fmt:<4} {stage['stage']:<9} "
+                          f"{stage['seconds']:>9.3f}s {stage['peak_mb'] if stage['peak_mb'] is not None else '-':>9} MB")
+    return records
+
+
+def compare(records, baseline_path):
+    """Prints the time ratio of each stage against a previous results file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["kind"], r["rows"], r["format"], r["stage"]): r for r in json.load(f)["results"]}
+
+    print(f"\nCompared with {baseline_path} (ratio > 1 is slower):")
+    for record in records:
+        previous = baseline.get((record["kind"], record["rows"], record["format"], record["stage"]))
+        if previous is None or not previous["seconds"]:
+            continue
+        ratio = record["seconds"] / previous["seconds"]
+        flag = "  <-- regression" if ratio > 1.2 else ""
+        print(f"{record['kind']:<9} {record['rows']:>10,} {record['format']:<4} {record['stage']:<9} "
+              f"{previous['seconds']:>9.3f}s -> {record['seconds']:>9.3f}s  x{ratio:.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard stages on synthetic reports.")
+    parser.add_argument("--kind", choices=sorted(BENCHMARKS), action="append", help="Report type (repeatable, default: all)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts, e.g. 10000 100000 10000000")
+    parser.add_argument("--formats", nargs="+", choices=["csv", "xlsx"], default=["csv", "xlsx"])
+    parser.add_argument("--xlsx-max-rows", type=int, default=DEFAULT_XLSX_MAX_ROWS, help="Skip xlsx above this many rows")
+    parser.add_argument("--data-dir", default="bench_data", help="Where generated reports are cached")
+    parser.add_argument("--output-dir", default="bench_results", help="Where result JSON files are written")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass (faster, no peak memory)")
+    args = parser.parse_args(argv)
+
+    records = run_benchmarks(args.kind or sorted(BENCHMARKS), args.sizes, args.formats, args.data_dir,
+                             args.xlsx_max_rows, not args.no_memory)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(args.output_dir, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "results": records,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(records, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+# Repeated string columns per report type that are stored dictionary-encoded
+CATEGORICAL_COLUMNS = {
+    "order": ["order-status", "fulfillment-channel", "ship-city", "sku", "product-name"],
+    "return": ["return request status", "return reason", "merchant sku", "item name"],
+    "inventory": ["sku", "asin"],
+}
+
+# Columns with more distinct values than this share of rows stay as plain strings,
+# since a dictionary would cost more than it saves (e.g. inventory SKUs)
+MAX_DISTINCT_RATIO = 0.5
+
+
+def is_categorical(series):
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def encode_categoricals(df, kind):
+    """Dictionary-encodes the repeated string columns of a cleaned report in place."""
+    for col in CATEGORICAL_COLUMNS[kind]:
+        if col not in df.columns or is_categorical(df[col]):
+            continue
+        if df[col].nunique() <= max(1, len(df) * MAX_DISTINCT_RATIO):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def observed_values(series):
+    """Returns the distinct non-null values of a column, using the codes when encoded."""
+    if not is_categorical(series):
+        return list(series.dropna().unique())
+    codes = series.cat.codes.to_numpy()
+    present = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories)) > 0
+    return list(series.cat.categories[present])
+
+
+def value_counts_codes(series):
+    """Like ``Series.value_counts`` but counted with ``np.bincount`` over the codes."""
+    if not is_categorical(series):
+        return series.value_counts()
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    index = pd.Index(series.cat.categories[order], name=series.name)
+    return pd.Series(counts[order], index=index, name="count")
+
+
+def column_memory_report(df):
+    """Returns bytes per column as loaded and as plain (decoded) columns."""
+    rows = []
+    for col in df.columns:
+        after = int(df[col].memory_usage(deep=True, index=False))
+        if is_categorical(df[col]):
+            before = int(df[col].astype(df[col].cat.categories.dtype).memory_usage(deep=True, index=False))
+        else:
+            before = after
+        rows.append({"Column": col, "Before (bytes)": before, "After (bytes)": after})
+
+    report = pd.DataFrame(rows)
+    total = {"Column": "Total", "Before (bytes)": report["Before (bytes)"].sum(), "After (bytes)": report["After (bytes)"].sum()}
+    report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+    report["Reduction"] = (report["Before (bytes)"] / report["After (bytes)"].clip(lower=1)).round(1).astype(str) + "x"
+    return report
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from ingest import ReportCache
+
+# Most points a time-series chart sends to the browser before it is bucketed or downsampled
+POINT_BUDGET = 500
+# Above this many points lines are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_MIN_POINTS = 1000
+# Markers are only drawn on short series; on long ones they dominate the payload
+MARKERS_MAX_POINTS = 120
+
+# Chart resolution choices offered by the pages, mapped to bucket names
+RESOLUTIONS = {"Auto": "auto", "Day": "day", "Week": "week", "Month": "month", "Downsample (LTTB)": "lttb"}
+BUCKET_LABELS = {"day": "daily", "week": "weekly", "month": "monthly"}
+
+# (dataset, filter selection, chart) -> figure, so reruns that leave a chart unchanged reuse it
+figure_cache = ReportCache(max_entries=32, spill_dir=None)
+
+
+def cached_figure(key, build, *args):
+    """Returns the figure cached under ``key``, building it with ``build(*args)`` on first use.
+
+    ``key`` must identify everything the figure shows, e.g. the dataset's
+    digest plus the filter selection and chart settings. Plotly is imported
+    by the builders, so a cache hit does not even load it.
+    """
+    figure = figure_cache.get(key)
+    if figure is None:
+        figure = build(*args)
+        figure_cache.put(key, figure)
+    return figure
+
+
+def choose_bucket(start, end, max_points=POINT_BUDGET):
+    """Picks the finest of day/week/month that keeps the span within ``max_points``."""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    if days <= max_points:
+        return "day"
+    if days / 7 <= max_points:
+        return "week"
+    return "month"
+
+
+def bucket_series(series, x, y, bucket):
+    """Sums ``y`` into day, week (starting Monday) or month buckets of ``x``."""
+    dates = pd.to_datetime(series[x])
+    if bucket == "day":
+        keys = dates.dt.normalize()
+    else:
+        keys = dates.dt.to_period("W" if bucket == "week" else "M").dt.start_time
+    totals = series[y].groupby(keys.to_numpy()).sum()
+    return pd.DataFrame({x: totals.index, y: totals.to_numpy()})
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indexes of ``threshold`` points that keep the series' shape."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket is the third vertex of each candidate triangle
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def time_series_figure(series, x, y, title, resolution="auto", max_points=POINT_BUDGET):
+    """Line chart that buckets or downsamples long series and switches to WebGL when large."""
+    label = None
+    if resolution == "lttb":
+        if len(series) > max_points:
+            positions = pd.to_datetime(series[x]).to_numpy(dtype="datetime64[ns]").astype("int64")
+            series = series.iloc[lttb(positions, series[y].to_numpy(), max_points)]
+            label = f"{max_points}-point downsample"
+    elif len(series):
+        bucket = choose_bucket(series[x].min(), series[x].max(), max_points) if resolution == "auto" else resolution
+        series = bucket_series(series, x, y, bucket)
+        if bucket != "day":
+            label = BUCKET_LABELS[bucket]
+
+    import plotly.express as px
+
+    return px.line(
+        series, x=x, y=y,
+        title=f"{title} ({label})" if label else title,
+        markers=len(series) <= MARKERS_MAX_POINTS,
+        render_mode="webgl" if len(series) > WEBGL_MIN_POINTS else "auto",
+    )
+
+
+def orders_over_time_figure(orders_by_date, resolution="auto"):
+    return time_series_figure(orders_by_date, "purchase-date", "Orders", "📈 Orders Over Time", resolution)
+
+
+def top_cities_figure(top_cities):
+    import plotly.express as px
+
+    top_cities = top_cities.reset_index()
+    top_cities.columns = ["City", "Orders"]
+    return px.bar(top_cities, x="City", y="Orders", title="🌆 Top Shipping Cities", color="Orders", text_auto=True)
+
+
+def returns_over_time_figure(returns_by_date, resolution="auto"):
+    return time_series_figure(returns_by_date, "return request date", "Returns", "📉 Return Requests Over Time", resolution)
+
+
+def top_reasons_figure(top_reasons):
+    import plotly.express as px
+
+    top_reasons = top_reasons.reset_index()
+    top_reasons.columns = ["Return Reason", "Count"]
+    return px.bar(top_reasons, x="Return Reason", y="Count", title="🔝 Top Return Reasons", color="Count", text_auto=True)
+
+
+def stock_distribution_figure(zero_inventory_skus, available_skus):
+    import plotly.express as px
+
+    stock_data = pd.DataFrame({
+        "Stock Status": ["Zero Stock", "With Stock"],
+        "Count": [zero_inventory_skus, available_skus]
+    })
+    return px.pie(
+        stock_data,
+        names="Stock Status",
+        values="Count",
+        title="📊 Zero Stock vs With Stock Distribution",
+        color="Stock Status",
+        color_discrete_map={"Zero Stock": "red", "With Stock": "green"},
+        hole=0.3
+    )
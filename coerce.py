@@ -0,0 +1,183 @@
+"""Typed-column conversion with inferred date formats and coercion counts.
+
+``to_datetime`` without a format falls back to slow per-value parsing when
+the first value does not pin the layout down. Here each text date column is
+sampled, the candidate format parsing most of the sample wins, and the whole
+column is then parsed with that exact format. Formats are cached by column
+name and value shape, so later uploads of the same report only check that
+the cached format still parses their sample instead of trying every one.
+Independent columns convert on a thread pool, and every conversion reports
+how many present values became NaT/NaN.
+"""
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrument import stage
+
+# Tried in order; on a tie the earlier format wins (month-first, like a format-less parse)
+DATE_FORMATS = [
+    "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "ISO8601",
+    "%m/%d/%Y", "%d/%m/%Y", "%d-%m-%Y", "%m-%d-%Y", "%Y/%m/%d",
+    "%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M",
+    "%d-%b-%Y", "%d %b %Y", "%b %d, %Y", "%d-%b-%Y %H:%M:%S",
+]
+# A UTC offset suffix such as "+00:00" or "Z"; parsing offsets is slow, so a
+# suffix shared by the whole column is stripped and applied once instead
+OFFSET_PATTERN = re.compile(r"(?:[+-]\d{2}:?\d{2}|Z)$")
+# Values sampled per column to pick a format, and the share of them it must parse
+SAMPLE_SIZE = 256
+MIN_PARSED_SHARE = 0.9
+MAX_WORKERS = int(os.environ.get("DASHBOARD_COERCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# (column, value shape) -> (inferred format or None, shared UTC offset suffix or None)
+_format_cache = {}
+
+
+def _shape(value):
+    """Masks digits and letters, e.g. "2025-01-31T16:51:12+00:00" -> "0000-00-00a00:00:00+00:00"."""
+    return re.sub(r"[A-Za-z]+", "a", re.sub(r"\d", "0", value))
+
+
+def _text_sample(series):
+    """Up to SAMPLE_SIZE non-blank strings spread evenly over the column."""
+    values = series.to_numpy(dtype=object)
+    # Look at evenly spaced candidates only, so sampling a large column stays cheap
+    candidates = np.unique(np.linspace(0, len(values) - 1, min(len(values), 4 * SAMPLE_SIZE)).astype(int))
+    sample = [values[i].strip() for i in candidates if isinstance(values[i], str) and values[i].strip()]
+    return sample[:: max(1, len(sample) // SAMPLE_SIZE)][:SAMPLE_SIZE]
+
+
+def _parsed_count(sample, fmt):
+    return int(pd.to_datetime(pd.Series(sample), format=fmt, errors="coerce").notna().sum())
+
+
+def infer_date_format(series, column=None):
+    """Returns ``(format, offset)`` for the column's text values.
+
+    ``format`` parses the values once the shared UTC ``offset`` suffix (if
+    any) is removed; it is None when no candidate fits, leaving pandas to infer.
+    """
+    sample = _text_sample(series)
+    if not sample:
+        return None, None
+    key = (column or series.name, _shape(sample[0]))
+    cached = _format_cache.get(key)
+
+    offsets = {match.group(0) if match else None for match in map(OFFSET_PATTERN.search, sample)}
+    offset = offsets.pop() if len(offsets) == 1 else None
+    if offset:
+        sample = [value[:-len(offset)] for value in sample]
+
+    # Month-first and day-first dates share a shape, so a cached format is
+    # only reused when it still parses this upload's sample
+    if cached is not None and cached[0] is not None and cached[1] == offset:
+        if _parsed_count(sample, cached[0]) >= MIN_PARSED_SHARE * len(sample):
+            return cached
+
+    best, best_parsed = None, MIN_PARSED_SHARE * len(sample) - 1
+    for fmt in DATE_FORMATS:
+        parsed = _parsed_count(sample, fmt)
+        if parsed > best_parsed:
+            best, best_parsed = fmt, parsed
+        if parsed == len(sample):
+            break
+    _format_cache[key] = (best, offset if best else None)
+    return _format_cache[key]
+
+
+def _present(series):
+    """Values that are neither missing nor blank strings."""
+    present = series.notna().to_numpy()
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        present = present & ~series.astype("string").str.strip().eq("").fillna(False).to_numpy()
+    return present
+
+
+def _parse_dates(series):
+    present = _present(series)
+    if not present.any():
+        # An all-blank column has nothing to infer a format from, and pandas warns on every load
+        return pd.Series(pd.NaT, index=series.index, dtype="datetime64[s]", name=series.name), None
+    if not present.all():
+        # Blank strings become NaT anyway; left in, pandas may guess its format from one and warn
+        series = series.where(present)
+    fmt, offset = infer_date_format(series)
+    if offset:
+        text = series.astype("string").str.strip()
+        # Only strip the suffix when every value carries it; otherwise parse offsets per value
+        suffixed = text.str.endswith(offset).fillna(True).to_numpy(dtype=bool)
+        if (suffixed | text.eq("").fillna(True).to_numpy(dtype=bool)).all():
+            parsed = pd.to_datetime(text.str.slice(stop=-len(offset)), format=fmt, errors="coerce")
+            return parsed.dt.tz_localize(pd.Timestamp("2000-01-01T00:00:00" + offset).tz), fmt + offset
+        fmt = None
+    try:
+        return pd.to_datetime(series, format=fmt, errors="coerce"), fmt
+    except ValueError:
+        # Mixed UTC offsets cannot share one timezone, so those columns are converted to UTC
+        return pd.to_datetime(series, errors="coerce", utc=True), None
+
+
+def _convert_date(series, naive):
+    start = time.perf_counter()
+    fmt = None
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        converted = series
+    else:
+        converted, fmt = _parse_dates(series)
+    if naive and isinstance(converted.dtype, pd.DatetimeTZDtype):
+        converted = converted.dt.tz_localize(None)
+    coerced = int((_present(series) & converted.isna().to_numpy()).sum())
+    return converted, {"kind": "date", "format": fmt, "coerced": coerced, "seconds": round(time.perf_counter() - start, 4)}
+
+
+def _convert_number(series):
+    start = time.perf_counter()
+    converted = series if pd.api.types.is_numeric_dtype(series.dtype) else pd.to_numeric(series, errors="coerce")
+    coerced = int((_present(series) & converted.isna().to_numpy()).sum())
+    return converted, {"kind": "number", "format": None, "coerced": coerced, "seconds": round(time.perf_counter() - start, 4)}
+
+
+def to_datetime(series, naive=False):
+    """Parses one column with its inferred (and cached) format; see ``coerce_columns``."""
+    return _convert_date(series, naive)[0]
+
+
+def coerce_columns(df, dates=(), numbers=(), naive=False):
+    """Converts the date and numeric columns of ``df`` in place, concurrently.
+
+    Columns that are missing are skipped. With ``naive`` timezone-aware dates
+    have their timezone dropped (keeping wall time). Returns one record per
+    column with its format, coerced value count and seconds, which is also
+    kept in ``df.attrs["coercion"]``.
+    """
+    jobs = [(col, _convert_date, (naive,)) for col in dates if col in df.columns]
+    jobs += [(col, _convert_number, ()) for col in numbers if col in df.columns]
+    with stage("coerce", rows=len(df)) as record:
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(jobs)))) as pool:
+            futures = [(col, pool.submit(convert, df[col], *args)) for col, convert, args in jobs]
+            report = []
+            for col, future in futures:
+                df[col], result = future.result()
+                report.append({"column": col, **result})
+        record["coerced"] = sum(result["coerced"] for result in report)
+    df.attrs["coercion"] = report
+    return report
+
+
+def render_report(df):
+    """Shows a sidebar panel with the conversion report kept on a cleaned frame."""
+    import streamlit as st
+
+    report = df.attrs.get("coercion")
+    if not report:
+        return
+    coerced = sum(result["coerced"] for result in report)
+    with st.sidebar.expander(f"🧪 Type conversion ({coerced:,} values coerced)", expanded=False):
+        st.dataframe(pd.DataFrame(report), hide_index=True, use_container_width=True)
+        st.caption("Coerced values were present in the file but could not be read as a date or number.")
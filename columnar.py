@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit, but stay usable without it
+    pa = None
+    ipc = None
+    pq = None
+
+# Where typed Arrow copies of uploaded reports are kept (uncompressed, so they
+# can be memory-mapped). Set DASHBOARD_INGEST_MODE=memory to always parse the
+# upload instead.
+COLUMNAR_DIR = os.environ.get("DASHBOARD_COLUMNAR_DIR", os.path.join(tempfile.gettempdir(), "dashboard-columnar"))
+INGEST_MODE = os.environ.get("DASHBOARD_INGEST_MODE", "columnar")
+
+
+# Schema metadata key holding the frame's attrs (the key pandas uses for Parquet)
+ATTRS_KEY = b"PANDAS_ATTRS"
+
+
+def enabled():
+    """Returns True when uploads are converted to Arrow files and mapped back column-wise."""
+    return INGEST_MODE == "columnar" and pq is not None
+
+
+def columnar_path(digest, kind, columns=None):
+    """Path of the typed copy of an upload; a copy holding only ``columns`` gets its own name."""
+    name = f"{kind}-{digest}"
+    if columns is not None:
+        name += "-" + hashlib.sha256("\0".join(columns).encode()).hexdigest()[:12]
+    return os.path.join(COLUMNAR_DIR, name + ".arrow")
+
+
+def mixed_columns(df):
+    """Returns the columns whose values mix types (e.g. blanks among numbers), which Arrow rejects."""
+    mixed = []
+    for col in df.columns:
+        if df[col].dtype != object and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            mixed.append(col)
+    return mixed
+
+
+def arrow_safe(df):
+    """Casts columns that mix types (e.g. blanks among numbers) to strings."""
+    df = df.copy()
+    for col in mixed_columns(df):
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("string").astype("category")
+        else:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def to_arrow(df):
+    """Converts a typed frame to an Arrow table that maps back into pandas with few copies."""
+    table = pa.Table.from_pandas(arrow_safe(df), preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            # Keep NaN as a value rather than a null, so the column needs no copy when mapped
+            values = pd.to_numeric(df[field.name]).to_numpy(dtype=field.type.to_pandas_dtype(), na_value=np.nan)
+            table = table.set_column(i, field, pa.array(values, from_pandas=False))
+    metadata = dict(table.schema.metadata or {})
+    if df.attrs:
+        metadata[ATTRS_KEY] = json.dumps(df.attrs, default=str).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def map_table(path):
+    """Memory-maps an Arrow file written by ``ensure_columnar``; no column data is read yet."""
+    return ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def table_frame(table):
+    """Converts a (mapped) table to pandas, sharing its buffers where the dtypes allow."""
+    df = table.to_pandas(split_blocks=True)
+    attrs = (table.schema.metadata or {}).get(ATTRS_KEY)
+    if attrs:
+        df.attrs = json.loads(attrs)
+    return df
+
+
+def write_atomic(path, write):
+    """Has ``write(tmp_path)`` write a file, then moves it to ``path`` in one step.
+
+    A concurrent reader never sees half a file. The temp name is unique per
+    process and thread, as background ingests may write the same file at once.
+    """
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove(tmp_path)
+        raise
+
+
+def ensure_columnar(digest, kind, build, columns=None):
+    """Writes the typed frame from ``build()`` to an Arrow file once and returns its path."""
+    path = columnar_path(digest, kind, columns)
+    if not os.path.exists(path):
+        os.makedirs(COLUMNAR_DIR, exist_ok=True)
+        table = to_arrow(build())
+
+        def write(tmp_path):
+            with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        write_atomic(path, write)
+    return path
+
+
+def remove(path):
+    """Deletes a typed copy; one the OS will not delete yet (mapped, on Windows) is left for later."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def read_columns(path, columns=None):
+    """Reads only the requested columns that exist in the Parquet file."""
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [col for col in columns if col in available]
+    return pd.read_parquet(path, columns=columns)
@@ -0,0 +1,84 @@
+import pandas as pd
+
+from ingest import ReportCache, file_digest
+from instrument import stage
+
+CUBE_DIMENSIONS = ["day", "order-status", "fulfillment-channel"]
+
+# content digest -> OrderCube, built once per upload
+cube_cache = ReportCache(max_entries=16, spill_dir=None)
+
+
+def day_range_mask(dates, start_date, end_date):
+    """Rows whose timestamp falls on any day from ``start_date`` to ``end_date`` inclusive."""
+    start_date, end_date = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+    return (dates >= start_date) & (dates < end_date + pd.Timedelta(days=1))
+
+
+class CubeSlice:
+    """Order metrics and the daily series for one filter selection."""
+
+    def __init__(self, total_orders, total_revenue, cancelled_orders, orders_by_date):
+        self.total_orders = total_orders
+        self.total_revenue = total_revenue
+        self.cancelled_orders = cancelled_orders
+        self.orders_by_date = orders_by_date
+
+
+class OrderCube:
+    """Order counts, ``item-price`` sums and cancellations pre-aggregated by
+    (day, order-status, fulfillment-channel).
+
+    Queries touch one cell per day and category combination instead of every
+    row, so changing a filter costs days x categories rather than rows.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    @classmethod
+    def build(cls, df):
+        """Builds the cube from a cleaned order frame."""
+        keys = pd.DataFrame({
+            "day": df["purchase-date"].dt.normalize(),
+            "order-status": df["order-status"],
+            "fulfillment-channel": df["fulfillment-channel"],
+            "item-price": df["item-price"],
+            "cancelled": (df["order-status"] == "Cancelled").astype("int64"),
+        })
+        cells = (
+            keys.groupby(CUBE_DIMENSIONS, observed=True)
+            .agg(orders=("item-price", "size"), revenue=("item-price", "sum"), cancelled=("cancelled", "sum"))
+            .reset_index()
+        )
+        return cls(cells)
+
+    def query(self, order_status, fulfillment_channel, start_date, end_date):
+        """Returns the metrics and daily order counts for a filter selection."""
+        cells = self.cells
+        selected = cells[
+            cells["order-status"].isin(order_status) &
+            cells["fulfillment-channel"].isin(fulfillment_channel) &
+            day_range_mask(cells["day"], start_date, end_date)
+        ]
+        daily = selected.groupby("day")["orders"].sum()
+        orders_by_date = pd.DataFrame({"purchase-date": daily.index.date, "Orders": daily.to_numpy()})
+        return CubeSlice(
+            int(selected["orders"].sum()),
+            float(selected["revenue"].sum()),
+            int(selected["cancelled"].sum()),
+            orders_by_date,
+        )
+
+
+def cached_order_cube(uploaded_file, df, build=True):
+    """Returns the cube for an upload, building it from ``df`` on first use (or None, unless ``build``)."""
+    key = (file_digest(uploaded_file), "order-cube")
+    if not build:
+        return cube_cache.peek(key)
+    cube = cube_cache.get(key)
+    if cube is None:
+        with stage("build cube", rows=len(df)):
+            cube = OrderCube.build(df)
+        cube_cache.put(key, cube)
+    return cube
@@ -0,0 +1,155 @@
+"""Process-wide registry of memory-mapped report datasets.
+
+A typed upload is kept on disk as an uncompressed Arrow file and mapped into
+memory once per process. Every Streamlit session that opens the same report
+gets the same frame: numeric, date and string columns point straight into
+the mapping (the OS page cache), so ten viewers of one report cost one copy.
+Sessions only hold filter selections in their state plus leases on the
+datasets their current page uses. A dataset nobody holds stays mapped for
+quick reopening until more than MAX_IDLE_DATASETS are idle; then it is
+unmapped and its file deleted, so the disk keeps no more copies than the
+registry does. A session that stops rerunning (a closed tab) loses its
+leases after LEASE_SECONDS.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import columnar
+
+MAX_IDLE_DATASETS = int(os.environ.get("DASHBOARD_IDLE_DATASETS", "4"))
+LEASE_SECONDS = float(os.environ.get("DASHBOARD_LEASE_SECONDS", "1800"))
+
+# Reruns run on the session's script thread; datasets held during a run are collected here
+_local = threading.local()
+
+
+class SharedDataset:
+    """One memory-mapped Arrow file and the frames materialized from it."""
+
+    def __init__(self, report, path):
+        self.report = report
+        self.path = path
+        self.table = columnar.map_table(path)
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def frame(self, columns=None):
+        """Returns the frame of ``columns`` (those that exist), built once and shared by every caller."""
+        if columns is not None:
+            names = set(self.table.column_names)
+            columns = tuple(col for col in columns if col in names)
+        with self._lock:
+            df = self._frames.get(columns)
+            if df is None:
+                df = columnar.table_frame(self.table if columns is None else self.table.select(list(columns)))
+                self._frames[columns] = df
+        return df
+
+
+class DatasetRegistry:
+    """Shared datasets by file path, with per-session leases on reports.
+
+    A report is ``(digest, kind)``; it may be mapped from more than one file
+    (the full typed copy, or one holding only some columns).
+    """
+
+    def __init__(self, max_idle=MAX_IDLE_DATASETS, lease_seconds=LEASE_SECONDS):
+        self.max_idle = max_idle
+        self.lease_seconds = lease_seconds
+        self._datasets = OrderedDict()
+        self._holders = {}
+        self._lock = threading.Lock()
+        # Report lookups answered by a typed copy on disk, and ones that had to parse
+        self.hits = 0
+        self.misses = 0
+
+    def open(self, report, path):
+        """Returns the dataset mapped from ``path``, mapping it on first use."""
+        with self._lock:
+            dataset = self._datasets.get(path)
+            if dataset is not None:
+                self._datasets.move_to_end(path)
+                return dataset
+        dataset = SharedDataset(report, path)
+        with self._lock:
+            # Another thread may have mapped it meanwhile; keep the first one
+            dataset = self._datasets.setdefault(path, dataset)
+            self._datasets.move_to_end(path)
+        self.evict()
+        return dataset
+
+    def retain(self, holder, reports):
+        """Replaces the reports ``holder`` (a session) holds, then evicts what nobody needs."""
+        with self._lock:
+            self._holders[holder] = (frozenset(reports), time.monotonic())
+        self.evict()
+
+    def record_lookup(self, hit):
+        """Counts a report lookup for ``stats``; a hit found a typed copy, a miss parses one."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def refcount(self, report):
+        """Number of live sessions holding ``report``."""
+        with self._lock:
+            return sum(report in reports for reports, _ in self._holders.values())
+
+    def evict(self):
+        """Drops expired leases, then the least recently opened unheld datasets beyond ``max_idle``.
+
+        The files of dropped datasets are deleted; frames still in use keep
+        their mapping, which the OS releases once the last one is gone.
+        """
+        evicted = []
+        with self._lock:
+            now = time.monotonic()
+            for holder, (_, seen) in list(self._holders.items()):
+                if now - seen > self.lease_seconds:
+                    del self._holders[holder]
+            held = set().union(*(reports for reports, _ in self._holders.values()))
+            idle = [path for path, dataset in self._datasets.items() if dataset.report not in held]
+            for path in idle[:max(0, len(idle) - self.max_idle)]:
+                del self._datasets[path]
+                evicted.append(path)
+        for path in evicted:
+            columnar.remove(path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "datasets": len(self._datasets),
+                "sessions": len(self._holders),
+                "mapped_bytes": sum(os.path.getsize(path) for path in self._datasets if os.path.exists(path)),
+            }
+
+
+# Shared by every session of this process
+registry = DatasetRegistry()
+
+
+def begin_run(holder):
+    """Starts collecting the reports the current rerun of session ``holder`` uses."""
+    _local.holder = holder
+    _local.reports = set()
+
+
+def hold(report):
+    """Marks ``report`` as used by the current rerun (a no-op outside a session's rerun)."""
+    reports = getattr(_local, "reports", None)
+    if reports is not None:
+        reports.add(report)
+
+
+def end_run():
+    """Leases the reports the finished rerun used to its session, releasing the rest."""
+    holder = getattr(_local, "holder", None)
+    if holder is not None:
+        registry.retain(holder, _local.reports)
+    _local.holder = _local.reports = None
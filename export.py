@@ -0,0 +1,157 @@
+"""Chunked, compressed exports of a dashboard's current view.
+
+Rows are written CHUNK_ROWS at a time into a spooled temporary file, which
+stays in memory while small and rolls over to disk when large, so an export
+never holds a second full copy of the view the way a CSV string does. Every
+export carries the KPIs shown on screen: as a Summary sheet in xlsx, in the
+file metadata of Parquet, and as a separate download next to CSV. Downloads
+are generated only when their button is clicked, not on every rerun.
+"""
+import gzip
+import io
+import json
+import os
+from tempfile import SpooledTemporaryFile
+
+import pandas as pd
+
+import columnar
+from instrument import stage
+
+# Format choices offered by the pages, mapped to file extensions
+EXPORT_FORMATS = {"CSV (gzip)": "csv.gz", "Parquet": "parquet", "Excel (xlsx)": "xlsx"}
+MIME_TYPES = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+}
+
+CHUNK_ROWS = 50_000
+# Exports up to this size stay in memory; larger ones spill to a temporary file
+SPOOL_BYTES = int(os.environ.get("DASHBOARD_EXPORT_SPOOL_MB", "32")) << 20
+# A worksheet holds 1,048,576 rows, one of which is the header
+XLSX_MAX_ROWS = 1_048_575
+
+# Parquet schema metadata key holding the KPI summary
+SUMMARY_KEY = b"dashboard.summary"
+
+
+def iter_chunks(df, rows=None, chunk_rows=CHUNK_ROWS):
+    """Yields ``df`` (or its ``rows``, by position) as frames of at most ``chunk_rows`` rows."""
+    total = len(df) if rows is None else len(rows)
+    for start in range(0, max(total, 1), chunk_rows):
+        stop = min(start + chunk_rows, total)
+        yield df.iloc[start:stop] if rows is None else df.take(rows[start:stop])
+
+
+def summary_frame(kpis):
+    """The KPI summary as a two-column Metric/Value table."""
+    return pd.DataFrame({"Metric": list(kpis), "Value": [str(value) for value in kpis.values()]})
+
+
+def write_csv_gz(df, sink, rows=None, kpis=None):
+    with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=6) as compressed:
+        text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+        for i, chunk in enumerate(iter_chunks(df, rows)):
+            chunk.to_csv(text, header=i == 0, index=False)
+        text.flush()
+        text.detach()
+
+
+def _parquet_schema(df):
+    """Arrow schema of the whole view, plus the columns written as strings because they mix types."""
+    mixed = columnar.mixed_columns(df)
+    schema = columnar.pa.Schema.from_pandas(df.iloc[:0].astype({col: "string" for col in mixed}), preserve_index=False)
+    for i, field in enumerate(schema):
+        if df[field.name].dtype == object and field.name not in mixed:
+            # An empty object column has no type yet; infer it from the values
+            schema = schema.set(i, field.with_type(columnar.pa.array(df[field.name], from_pandas=True).type))
+    return schema, mixed
+
+
+def write_parquet(df, sink, rows=None, kpis=None):
+    schema, mixed = _parquet_schema(df)
+    if kpis:
+        schema = schema.with_metadata({**(schema.metadata or {}), SUMMARY_KEY: json.dumps(kpis, default=str).encode()})
+    with columnar.pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+        for chunk in iter_chunks(df, rows):
+            chunk = chunk.astype({col: "string" for col in mixed}) if mixed else chunk
+            writer.write_table(columnar.pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _excel_values(chunk):
+    """Rows of plain Python values; Excel has no timezones, so those keep their wall time."""
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        if isinstance(chunk[col].dtype, pd.DatetimeTZDtype):
+            chunk[col] = chunk[col].dt.tz_localize(None)
+    values = chunk.astype(object)
+    return values.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def write_xlsx(df, sink, rows=None, kpis=None, sheet_name="Data"):
+    if (len(df) if rows is None else len(rows)) > XLSX_MAX_ROWS:
+        raise ValueError(f"The view has more than {XLSX_MAX_ROWS:,} rows, which do not fit in a worksheet; export CSV or Parquet instead.")
+    import openpyxl
+
+    # Write-only workbooks stream rows to disk instead of keeping every cell
+    workbook = openpyxl.Workbook(write_only=True)
+    if kpis:
+        summary = workbook.create_sheet("Summary")
+        summary.append(["Metric", "Value"])
+        for metric, value in kpis.items():
+            summary.append([metric, value if isinstance(value, (int, float)) else str(value)])
+    data = workbook.create_sheet(sheet_name)
+    data.append([str(col) for col in df.columns])
+    for chunk in iter_chunks(df, rows):
+        for row in _excel_values(chunk):
+            data.append(row)
+    workbook.save(sink)
+
+
+WRITERS = {"csv.gz": write_csv_gz, "parquet": write_parquet, "xlsx": write_xlsx}
+
+
+def export_bytes(df, extension, kpis=None, rows=None):
+    """Returns the exported file as a reader over the spooled temporary file it was written to.
+
+    ``rows`` selects positions of ``df`` to export (all rows when None). The
+    reader is rewound; closing it (or dropping it) deletes the temporary file.
+    """
+    with stage("export", rows=len(df) if rows is None else len(rows)):
+        spool = SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        try:
+            WRITERS[extension](df, spool, rows, kpis)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        # Streamlit takes buffered binary readers, which a spool on its own is not
+        return io.BufferedReader(spool)
+
+
+def export_panel(df, name, kpis, rows=None, key="export"):
+    """Shows a format choice and download buttons for the view and its KPI summary.
+
+    ``rows`` may be a callable returning the positions to export, so the
+    selection is only resolved when a download is generated (or, for xlsx,
+    when the format is chosen, to check that it fits in a worksheet).
+    """
+    import streamlit as st
+
+    st.markdown("### 📥 Export")
+    col1, col2, col3 = st.columns([2, 2, 1])
+    label = col1.selectbox("Export format", list(EXPORT_FORMATS), key=f"{key}_format", label_visibility="collapsed")
+    extension = EXPORT_FORMATS[label]
+    if extension == "xlsx" and callable(rows):
+        rows = rows()
+    if extension == "xlsx" and (len(df) if rows is None else len(rows)) > XLSX_MAX_ROWS:
+        st.warning(f"Excel exports are limited to {XLSX_MAX_ROWS:,} rows; choose CSV or Parquet for this view.")
+        return
+
+    def generate():
+        return export_bytes(df, extension, kpis, rows() if callable(rows) else rows)
+
+    col2.download_button(f"📥 Download {label}", generate, f"{name}.{extension}", MIME_TYPES[extension], key=f"{key}_data")
+    col3.download_button("Summary (CSV)", lambda: summary_frame(kpis).to_csv(index=False), f"{name}_summary.csv", MIME_TYPES["csv"], key=f"{key}_summary")
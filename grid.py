@@ -0,0 +1,124 @@
+"""Server-side paginated table: only the visible page of rows is sent to the browser."""
+import numpy as np
+import streamlit as st
+
+from ingest import ReportCache
+from instrument import stage
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# cache key -> GridSource, so sort orders and search indexes survive reruns
+grid_cache = ReportCache(max_entries=32, spill_dir=None)
+
+
+class GridSource:
+    """Pages, sort orders and prefix-search indexes over a server-side frame.
+
+    Sort orders and search indexes are built on first use and kept, so
+    paging through a sorted or searched table only slices positions.
+    """
+
+    def __init__(self, df, search_columns=()):
+        self.df = df
+        self.search_columns = [col for col in search_columns if col in df.columns]
+        self._orders = {}
+        self._search_indexes = {}
+
+    def order(self, sort_by=None, ascending=True):
+        """Row positions in display order."""
+        if sort_by is None:
+            return np.arange(len(self.df))
+        key = (sort_by, ascending)
+        if key not in self._orders:
+            column = self.df[sort_by].reset_index(drop=True)
+            self._orders[key] = column.sort_values(ascending=ascending, na_position="last", kind="stable").index.to_numpy()
+        return self._orders[key]
+
+    def _search_index(self, col):
+        if col not in self._search_indexes:
+            keys = np.asarray(self.df[col].astype("string").fillna("").str.lower(), dtype=str)
+            positions = np.argsort(keys, kind="stable")
+            self._search_indexes[col] = (keys[positions], positions)
+        return self._search_indexes[col]
+
+    def _selected(self, positions):
+        selected = np.zeros(len(self.df), dtype=bool)
+        selected[positions] = True
+        return selected
+
+    def search(self, text):
+        """Positions of rows where any search column starts with ``text`` (case-insensitive)."""
+        prefix = text.strip().lower()
+        matches = []
+        for col in self.search_columns:
+            keys, positions = self._search_index(col)
+            lo, hi = np.searchsorted(keys, [prefix, prefix + "\U0010ffff"], side="left")
+            matches.append(positions[lo:hi])
+        return np.unique(np.concatenate(matches)) if matches else np.arange(0)
+
+    def page(self, page, page_size, sort_by=None, ascending=True, search=None, rows=None):
+        """Returns one page of rows and the number of rows across all pages.
+
+        ``rows`` limits the table to those positions of the frame, e.g. a
+        filter engine's matches, so a filtered view needs no copy of its own.
+        """
+        positions = self.order(sort_by, ascending)
+        if rows is not None:
+            positions = positions[self._selected(rows)[positions]]
+        if search:
+            positions = positions[self._selected(self.search(search))[positions]]
+        start = page * page_size
+        return self.df.iloc[positions[start:start + page_size]], len(positions)
+
+
+def cached_grid_source(cache_key, df, search_columns=()):
+    """Returns the GridSource for ``cache_key``, wrapping ``df`` on first use.
+
+    ``cache_key`` must change whenever the frame's contents do, e.g. include
+    the upload digest. Filtered views of one frame share its source by
+    passing row positions to ``GridSource.page`` rather than a new frame.
+    """
+    source = grid_cache.get(cache_key)
+    if source is None:
+        source = GridSource(df, search_columns)
+        grid_cache.put(cache_key, source)
+    return source
+
+
+def paginated_table(df, key, cache_key, search_columns=(), page_size=50, height=None, rows=None, rows_key=None):
+    """Renders ``df`` one page at a time with sorting and optional SKU/ASIN-style prefix search.
+
+    ``key`` prefixes the widget keys; ``cache_key`` identifies the frame's
+    contents across reruns (see ``cached_grid_source``). ``rows`` shows only
+    those positions of ``df``, and ``rows_key`` identifies the selection they
+    came from, so the table returns to its first page when it changes.
+    """
+    source = cached_grid_source(cache_key, df, search_columns)
+
+    controls = st.columns([3, 2, 1, 1, 1])
+    search = None
+    if source.search_columns:
+        search = controls[0].text_input(f"Search {' / '.join(c.upper() for c in source.search_columns)}",
+                                        key=f"{key}_search", placeholder="Starts with...")
+    sort_by = controls[1].selectbox("Sort by", [None] + list(df.columns), key=f"{key}_sort",
+                                    format_func=lambda col: "(file order)" if col is None else col)
+    ascending = controls[2].selectbox("Order", ["Asc", "Desc"], key=f"{key}_order") == "Asc"
+    page_size = controls[3].selectbox("Rows", PAGE_SIZES, index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+                                      key=f"{key}_page_size")
+
+    with stage("table") as record:
+        _, total_rows = source.page(0, 0, sort_by, ascending, search, rows)
+        page_count = max(1, -(-total_rows // page_size))
+        # A new view (search, sort, size or data) starts again from its first page
+        view = hash((cache_key, rows_key, search, sort_by, ascending, page_size))
+        page = controls[4].number_input("Page", min_value=1, max_value=page_count, value=1, step=1,
+                                        key=f"{key}_page_{view}") - 1
+        shown, _ = source.page(page, page_size, sort_by, ascending, search, rows)
+        if height is None:
+            st.dataframe(shown, use_container_width=True)
+        else:
+            st.dataframe(shown, height=height, use_container_width=True)
+        record["rows"] = len(shown)
+
+    first = page * page_size + 1 if total_rows else 0
+    st.caption(f"Rows {first:,}–{first + len(shown) - 1 if total_rows else 0:,} of {total_rows:,} · page {page + 1} of {page_count}")
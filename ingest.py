@@ -0,0 +1,378 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import columnar
+import datasets
+from instrument import stage
+
+# Number of cleaned reports kept in memory, and optional directory the typed
+# frames are spilled to so that a reload of the same report skips parsing.
+MAX_CACHED_REPORTS = int(os.environ.get("DASHBOARD_CACHE_SIZE", "8"))
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR")
+
+# Share of a parse's progress given to reading the file; converting types takes the rest
+READ_SHARE = 0.8
+# Workbook rows read between progress reports
+PROGRESS_ROWS = 500
+
+
+class ReportCache:
+    """Bounded LRU of cleaned report DataFrames keyed by upload content hash."""
+
+    def __init__(self, max_entries=MAX_CACHED_REPORTS, spill_dir=CACHE_DIR):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _spill_path(self, key):
+        digest, kind, columns = key
+        name = f"{kind}-{digest}"
+        if columns is not None:
+            name += "-" + hashlib.sha256("\0".join(columns).encode()).hexdigest()[:12]
+        return os.path.join(self.spill_dir, name + ".pkl")
+
+    def get(self, key):
+        """Returns the cached frame for ``key`` or None, checking disk after memory."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.spill_dir and os.path.exists(self._spill_path(key)):
+            df = pd.read_pickle(self._spill_path(key))
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, df)
+            return df
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def peek(self, key):
+        """Returns the in-memory frame for ``key`` or None, counting only a hit.
+
+        For checking on the script thread whether work can be skipped; the
+        lookup that follows a None counts the miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        return None
+
+    def put(self, key, df):
+        """Stores a cleaned frame in memory and, if enabled, on disk."""
+        self._remember(key, df)
+        if self.spill_dir:
+            columnar.write_atomic(self._spill_path(key), df.to_pickle)
+
+    def _remember(self, key, df):
+        with self._lock:
+            self._entries[key] = df
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns hit/miss counters and the current number of in-memory entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+# Shared across Streamlit reruns and sessions, since imported modules are not re-executed
+report_cache = ReportCache()
+
+
+# Streamlit upload id -> content digest, so one upload is hashed once per session
+_digests = OrderedDict()
+
+# Streamlit upload id -> header row, so an upload's columns are sniffed once
+_headers = OrderedDict()
+
+
+def file_digest(uploaded_file):
+    """Returns a SHA-256 hex digest of the uploaded file's bytes."""
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is not None and file_id in _digests:
+        return _digests[file_id]
+
+    if hasattr(uploaded_file, "getvalue"):
+        data = uploaded_file.getvalue()
+    else:
+        data = uploaded_file.read()
+        uploaded_file.seek(0)
+    digest = hashlib.sha256(data).hexdigest()
+
+    if file_id is not None:
+        _digests[file_id] = digest
+        while len(_digests) > 256:
+            _digests.popitem(last=False)
+    return digest
+
+
+def _rewind(uploaded_file):
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+
+
+def read_header(uploaded_file):
+    """Returns the column names of a CSV or Excel file from its header row alone.
+
+    CSV reads stop after the first line; workbooks are opened in openpyxl's
+    streaming read-only mode and only the first row is read.
+    """
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is not None and file_id in _headers:
+        return _headers[file_id]
+
+    name = str(getattr(uploaded_file, "name", uploaded_file))
+    _rewind(uploaded_file)
+    try:
+        if name.endswith(".csv"):
+            header = [str(col) for col in pd.read_csv(uploaded_file, nrows=0).columns]
+        else:
+            import openpyxl
+
+            workbook = openpyxl.load_workbook(uploaded_file, read_only=True)
+            try:
+                first_row = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+            finally:
+                workbook.close()
+            header = [str(col) for col in first_row if col is not None]
+    finally:
+        _rewind(uploaded_file)
+
+    if file_id is not None:
+        _headers[file_id] = header
+        while len(_headers) > 256:
+            _headers.popitem(last=False)
+    return header
+
+
+class ProgressReader(io.RawIOBase):
+    """Read-only file wrapper that reports the share of bytes read so far.
+
+    The CSV parser pulls the file through it in buffer-sized chunks, and
+    ``callback(fraction)`` is called whenever reading gets further into it.
+    """
+
+    def __init__(self, raw, callback):
+        self.raw = raw
+        self.callback = callback
+        raw.seek(0, os.SEEK_END)
+        self.size = raw.tell() or 1
+        raw.seek(0)
+        self.furthest = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self.raw.seek(offset, whence)
+
+    def tell(self):
+        return self.raw.tell()
+
+    def readinto(self, buffer):
+        data = self.raw.read(len(buffer))
+        buffer[:len(data)] = data
+        position = self.raw.tell()
+        if position > self.furthest:
+            self.furthest = position
+            self.callback(min(position / self.size, 1.0))
+        return len(data)
+
+
+def _excel_value(cell):
+    """A cell's value as pandas' openpyxl reader gives it: blanks as "", errors as NaN, whole floats as int."""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float("nan")
+    if cell.data_type == TYPE_NUMERIC and int(cell.value) == cell.value:
+        return int(cell.value)
+    return cell.value
+
+
+def read_excel_rows(file, usecols=None, progress=None):
+    """Reads the first worksheet like ``pd.read_excel``, calling ``progress(fraction)`` by rows read.
+
+    A workbook is a zip whose directory sits at its end, so the share of
+    bytes read says nothing about how far parsing got; the worksheet's
+    declared row count does.
+    """
+    import openpyxl
+    from pandas.io.parsers import TextParser
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row
+        # The declared dimensions may be wrong, so read every row there is
+        sheet.reset_dimensions()
+        data = []
+        last_row_with_data = -1
+        for number, row in enumerate(sheet.rows):
+            values = [_excel_value(cell) for cell in row]
+            while values and values[-1] == "":
+                values.pop()
+            if values:
+                last_row_with_data = number
+            data.append(values)
+            if progress is not None and total and number % PROGRESS_ROWS == 0:
+                progress(min(number / total, 1.0))
+    finally:
+        workbook.close()
+
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(values) for values in data)
+    data = [values + [""] * (width - len(values)) for values in data]
+    df = TextParser(data, header=0, usecols=usecols, skip_blank_lines=False).read()
+    if progress is not None:
+        progress(1.0)
+    return df
+
+
+def load_data(uploaded_file, columns=None, progress=None):
+    """Loads CSV or Excel file (an upload or a path) into a Pandas DataFrame.
+
+    When ``columns`` is given only those columns are parsed (names are matched
+    as-is or stripped and lowercased, as the return report cleaner does).
+    ``progress(fraction)`` is called as the file is read.
+    """
+    name = str(getattr(uploaded_file, "name", uploaded_file))
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+
+        def usecols(col):
+            return col in wanted or str(col).strip().lower() in wanted
+
+    if progress is None:
+        _rewind(uploaded_file)
+        return _read(uploaded_file, name, usecols)
+    if not name.endswith(".csv"):
+        _rewind(uploaded_file)
+        try:
+            return read_excel_rows(uploaded_file, usecols, progress)
+        finally:
+            _rewind(uploaded_file)
+    raw = open(uploaded_file, "rb") if isinstance(uploaded_file, (str, os.PathLike)) else uploaded_file
+    try:
+        return _read(io.BufferedReader(ProgressReader(raw, progress), buffer_size=1 << 20), name, usecols)
+    finally:
+        if raw is not uploaded_file:
+            raw.close()
+        else:
+            _rewind(uploaded_file)
+
+
+def _read(file, name, usecols):
+    return pd.read_csv(file, usecols=usecols) if name.endswith(".csv") else pd.read_excel(file, usecols=usecols)
+
+
+def cached_report(uploaded_file, kind, columns=None):
+    """Returns an upload's typed frame if it was loaded before, without parsing; None otherwise.
+
+    In columnar mode that is any Arrow copy on disk holding ``columns``;
+    otherwise the in-memory report cache.
+    """
+    digest = file_digest(uploaded_file)
+    if columnar.enabled():
+        for path in (columnar.columnar_path(digest, kind), columnar.columnar_path(digest, kind, columns)):
+            try:
+                df = datasets.registry.open((digest, kind), path).frame(columns)
+            except FileNotFoundError:
+                # Never written, or deleted when its dataset was evicted
+                continue
+            datasets.registry.record_lookup(hit=True)
+            return df
+        return None
+    return report_cache.peek((digest, kind, tuple(columns) if columns is not None else None))
+
+
+def load_report(uploaded_file, kind, clean, columns=None, progress=None):
+    """Returns the cleaned, typed frame for an upload, parsing it only on a cache miss.
+
+    ``clean`` takes the raw frame and returns the typed one; it may raise
+    ValueError for an unusable report. When ``columns`` is given only those
+    (that exist) are parsed and returned, so ``columns`` must include every
+    column ``clean`` requires. In columnar mode the typed frame is written to
+    an Arrow file on first load, which every session then shares through the
+    memory-mapped dataset registry (from the full copy when one exists).
+    ``progress(fraction, message)`` is called as a parse goes along.
+    The returned frame is shared between reruns, so callers must not modify
+    it in place.
+    """
+    digest = file_digest(uploaded_file)
+    datasets.hold((digest, kind))
+    if columnar.enabled():
+        path = columnar.columnar_path(digest, kind)
+        if not os.path.exists(path):
+            path = columnar.columnar_path(digest, kind, columns)
+        hit = os.path.exists(path)
+        datasets.registry.record_lookup(hit)
+        if not hit:
+            path = columnar.ensure_columnar(digest, kind, lambda: parse_report(uploaded_file, clean, columns, progress), columns)
+        with stage("map columns") as record:
+            df = datasets.registry.open((digest, kind), path).frame(columns)
+            record["rows"] = len(df)
+        return df
+
+    with stage("cache lookup") as record:
+        key = (digest, kind, tuple(columns) if columns is not None else None)
+        df = report_cache.get(key)
+        record["rows"] = len(df) if df is not None else None
+    if df is None:
+        df = parse_report(uploaded_file, clean, columns, progress)
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        report_cache.put(key, df)
+    return df
+
+
+def parse_report(uploaded_file, clean, columns=None, progress=None):
+    """Reads an upload (only ``columns``, if given) and cleans it, timing the two stages separately."""
+    with stage("read") as record:
+        read_progress = None
+        if progress is not None:
+            def read_progress(fraction):
+                progress(READ_SHARE * fraction, "Reading file")
+        df = load_data(uploaded_file, columns, read_progress)
+        record["rows"] = len(df)
+    if progress is not None:
+        progress(READ_SHARE, f"Converting {len(df):,} rows")
+    with stage("convert") as record:
+        df = clean(df)
+        record["rows"] = len(df)
+    return df
@@ -0,0 +1,148 @@
+"""Opt-in per-stage timing for the dashboard pages.
+
+Pages wrap their stages in ``with stage("filter") as record:`` and may set
+``record["rows"]``. When instrumentation is off for the current rerun the
+context manager records nothing, so the wrappers cost next to nothing.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# Default JSONL file for offline analysis when logging is switched on
+PERF_LOG = os.environ.get("DASHBOARD_PERF_LOG", "dashboard_perf.jsonl")
+
+# Streamlit runs each session's script on its own thread
+_local = threading.local()
+
+# tracemalloc and its peak are process-wide, so one run at a time traces memory;
+# while it does, other sessions' runs that ask for it record time only
+_tracing_run = None
+_tracing_lock = threading.Lock()
+
+
+class RunRecorder:
+    """Stage records for one script run of one page."""
+
+    def __init__(self, page, trace_memory=False, log_path=None):
+        self.page = page
+        self.run_id = uuid.uuid4().hex[:12]
+        self.log_path = log_path
+        self.stages = []
+        self.trace_memory = trace_memory and _claim_tracing(self)
+        # Asked for memory tracing, but another session's run was tracing
+        self.memory_busy = trace_memory and not self.trace_memory
+
+    def close(self):
+        """Releases this run's hold on memory tracing; safe to call more than once."""
+        if self.trace_memory:
+            self.trace_memory = False
+            _release_tracing(self)
+
+    def add(self, record):
+        self.stages.append(record)
+
+    def flush(self):
+        """Appends this run's stages to the JSONL log, if one was requested."""
+        if not self.log_path or not self.stages:
+            return
+        timestamp = datetime.now().isoformat(timespec="milliseconds")
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            for record in self.stages:
+                f.write(json.dumps({"time": timestamp, "run": self.run_id, "page": self.page, **record}) + "\n")
+
+
+def _claim_tracing(recorder):
+    """Starts tracemalloc for ``recorder``; returns False if another run is tracing."""
+    global _tracing_run
+    with _tracing_lock:
+        if _tracing_run is not None:
+            return False
+        _tracing_run = recorder
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return True
+
+
+def _release_tracing(recorder):
+    global _tracing_run
+    with _tracing_lock:
+        if _tracing_run is recorder:
+            _tracing_run = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+def begin_run(page, enabled, trace_memory=False, log_path=None):
+    """Starts recording stages for the current rerun, or turns recording off."""
+    previous = current_run()
+    if previous is not None:
+        # A rerun interrupted before end_run must not keep tracing alive
+        previous.close()
+    _local.recorder = RunRecorder(page, trace_memory, log_path) if enabled else None
+    return _local.recorder
+
+
+def current_run():
+    return getattr(_local, "recorder", None)
+
+
+def use_run(recorder):
+    """Makes ``recorder`` the current thread's recorder, e.g. on a worker; returns the previous one."""
+    previous = current_run()
+    _local.recorder = recorder
+    return previous
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Times a block and records its wall time, peak memory delta and row count."""
+    recorder = current_run()
+    record = {"stage": name, "rows": rows}
+    if recorder is None:
+        yield record
+        return
+
+    if recorder.trace_memory:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        if recorder.trace_memory:
+            record["peak_mb"] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2)
+        recorder.add(record)
+
+
+def end_run():
+    """Finishes the current rerun, writing its log lines, and returns the recorder."""
+    recorder = current_run()
+    if recorder is not None:
+        recorder.flush()
+        recorder.close()
+    _local.recorder = None
+    return recorder
+
+
+def render_panel(recorder):
+    """Shows the recorded stages in a collapsible sidebar panel."""
+    import pandas as pd
+    import streamlit as st
+
+    if recorder is None:
+        return
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        if not recorder.stages:
+            st.write("No stages recorded on this run.")
+            return
+        stages = pd.DataFrame(recorder.stages)
+        st.dataframe(stages, hide_index=True, use_container_width=True)
+        st.caption(f"Total {stages['seconds'].sum():.3f}s across {len(stages)} stages (run {recorder.run_id})")
+        if recorder.memory_busy:
+            st.caption("Peak memory was not traced: another session was tracing it, and its peaks would have mixed with this run's.")
@@ -0,0 +1,180 @@
+"""Background ingestion of uploaded reports.
+
+Parsing, type conversion and the aggregate builds run on a process-wide
+thread pool instead of the Streamlit script thread. A page submits its
+upload, gets a job handle back and polls it while drawing a progress bar;
+when the user switches page the rerun stops the polling but not the job, so
+order, return and inventory reports can be ingested at the same time and
+each page renders as soon as its own job is done. Jobs are keyed by upload
+content, so a rerun (or another session) attaches to the running job
+rather than starting a second parse. An upload whose frame and indexes are
+cached already is served on the script thread without queueing for the pool.
+"""
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import datasets
+import instrument
+from ingest import cached_report, file_digest, load_report
+from instrument import stage
+
+INGEST_WORKERS = int(os.environ.get("DASHBOARD_INGEST_WORKERS", "4"))
+# Seconds between progress bar updates while a page waits for its job
+POLL_SECONDS = 0.25
+
+_pool = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+# key -> IngestJob, for jobs still running; finished jobs live on in their handles
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+class IngestJob:
+    """Handle of one background ingest: its progress, and its result once done."""
+
+    def __init__(self, key, label):
+        self.key = key
+        self.label = label
+        self.progress = 0.0
+        self.message = "Queued"
+        self.started = time.perf_counter()
+        self.future = None
+        # (digest, kind) of the report being loaded, leased to sessions that wait for it
+        self.report = key[:2]
+        # Stages timed on the worker; the job may outlive the run that started it,
+        # so they are handed to whichever runs wait for it (without memory tracing)
+        self.recorder = instrument.RunRecorder(label)
+
+    def update(self, fraction, message=None):
+        """Progress callback for the worker; ``fraction`` runs from 0 to 1."""
+        self.progress = min(max(float(fraction), self.progress), 1.0)
+        if message is not None:
+            self.message = message
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        """Returns what the job produced, re-raising its exception if it failed."""
+        return self.future.result()
+
+
+def _snapshot(uploaded_file):
+    """Private in-memory copy of an upload, so the worker never shares its file position."""
+    if not hasattr(uploaded_file, "getvalue"):
+        return uploaded_file
+    copy = io.BytesIO(uploaded_file.getvalue())
+    copy.name = uploaded_file.name
+    copy.file_id = getattr(uploaded_file, "file_id", None)
+    return copy
+
+
+def _forget(job):
+    with _jobs_lock:
+        if _jobs.get(job.key) is job:
+            del _jobs[job.key]
+
+
+def submit(key, label, func):
+    """Runs ``func(job)`` in the background, or returns the job already running under ``key``."""
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None:
+            return job
+        job = IngestJob(key, label)
+        job.future = _pool.submit(func, job)
+        _jobs[key] = job
+    job.future.add_done_callback(lambda _: _forget(job))
+    return job
+
+
+def finished(key, label, result):
+    """Returns a job that is already done with ``result``, for work the caches answered."""
+    job = IngestJob(key, label)
+    job.future = Future()
+    job.future.set_result(result)
+    job.update(1.0, "Cached")
+    return job
+
+
+def start_ingest(uploaded_file, kind, clean, columns=None, prepare=None):
+    """Starts loading an upload in the background (see ``load_report``) and returns its job.
+
+    ``prepare(file, df)``, if given, runs on the worker as well, e.g. to build
+    the upload's cube and filter indexes; the job's result is then
+    ``(df, prepare(file, df))`` instead of ``df``. ``prepare(file, df,
+    build=False)`` must return None rather than build anything not cached.
+    When the frame (and what ``prepare`` returns) is cached, the returned job
+    is already done and nothing is queued.
+    """
+    upload = _snapshot(uploaded_file)
+    key = (file_digest(upload), kind, tuple(columns) if columns is not None else None, prepare)
+    label = f"{uploaded_file.name} ({kind})"
+
+    with stage("cache lookup") as record:
+        df = cached_report(upload, kind, columns)
+        prepared = prepare(upload, df, build=False) if df is not None and prepare is not None else None
+        record["rows"] = len(df) if df is not None else None
+    if df is not None and prepare is None:
+        return finished(key, label, df)
+    if prepared is not None:
+        return finished(key, label, (df, prepared))
+
+    def run(job):
+        previous = instrument.use_run(job.recorder)
+        try:
+            job.update(0.0, "Reading file")
+            df = load_report(upload, kind, clean, columns, progress=job.update)
+            if prepare is None:
+                return df
+            job.update(1.0, "Building indexes")
+            return df, prepare(upload, df)
+        finally:
+            instrument.use_run(previous)
+
+    return submit(key, label, run)
+
+
+def wait_for(job):
+    """Blocks this rerun until ``job`` is done, showing its progress; returns its result."""
+    import streamlit as st
+
+    datasets.hold(job.report)
+    with stage("wait for ingest"):
+        # Jobs served from the caches finish before a progress bar is worth drawing
+        if not wait([job.future], timeout=POLL_SECONDS).done:
+            bar = st.progress(0.0, text=f"⏳ {job.label}: {job.message}")
+            while not wait([job.future], timeout=POLL_SECONDS).done:
+                bar.progress(job.progress, text=f"⏳ {job.label}: {job.message} ({time.perf_counter() - job.started:.0f}s)")
+            bar.empty()
+    recorder = instrument.current_run()
+    if recorder is not None:
+        for record in job.recorder.stages:
+            recorder.add({**record, "worker": job.label})
+    return job.result()
+
+
+def ingest_report(uploaded_file, kind, clean, columns=None, prepare=None):
+    """``start_ingest`` and ``wait_for`` in one call, for pages with a single upload."""
+    return wait_for(start_ingest(uploaded_file, kind, clean, columns, prepare))
+
+
+def running_jobs():
+    """Returns the jobs still running, oldest first."""
+    with _jobs_lock:
+        return list(_jobs.values())
+
+
+def render_jobs():
+    """Shows the background ingests still running, e.g. ones started on another page."""
+    import streamlit as st
+
+    jobs = running_jobs()
+    if jobs:
+        st.sidebar.markdown("**⏳ Ingesting**")
+        for job in jobs:
+            st.sidebar.progress(job.progress, text=f"{job.label}: {job.message}")
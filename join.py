@@ -0,0 +1,177 @@
+"""Per-SKU return rates from an order report joined to a return report.
+
+Headless like ``analytics.py``: the return-rate page and any offline caller
+share the same join.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics import ORDER_LOAD_COLUMNS
+from cube import day_range_mask
+from ingest import ReportCache, file_digest
+from instrument import stage
+
+# Columns read from each report (the order cleaner requires all of ORDER_COLUMNS)
+JOIN_ORDER_COLUMNS = ORDER_LOAD_COLUMNS
+JOIN_RETURN_COLUMNS = ["order id", "order date", "merchant sku", "return quantity", "refunded amount"]
+
+# (order digest, return digest) -> SkuJoin
+join_cache = ReportCache(max_entries=8, spill_dir=None)
+
+
+class KeyIndex:
+    """Hash index assigning one dense integer id per distinct key across columns.
+
+    Only the dictionary (a categorical's categories, or the uniques of a
+    plain column) goes through the hash table; rows are mapped to ids by
+    indexing the per-column lookup with their codes.
+    """
+
+    def __init__(self):
+        self.ids = {}
+
+    def encode(self, series):
+        """Returns the key id of every row, -1 where the key is missing."""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, labels = pd.factorize(series)
+        lookup = np.array([self.ids.setdefault(str(label).strip(), len(self.ids)) for label in labels] + [-1], dtype=np.int64)
+        # Code -1 (missing) picks the trailing -1
+        return lookup[codes]
+
+    def labels(self):
+        return list(self.ids)
+
+
+def _units(series, size):
+    """Unit counts, one per row where the column is missing or blank."""
+    if series is None:
+        return np.ones(size)
+    return pd.to_numeric(series, errors="coerce").fillna(1).to_numpy(dtype=float)
+
+
+@dataclass
+class SkuReturnRates:
+    ordered_units: int
+    returned_units: int
+    matched_returns: int
+    refunded_amount: float
+    table: pd.DataFrame
+
+    @property
+    def return_rate(self):
+        return self.returned_units / self.ordered_units if self.ordered_units else None
+
+    def to_dict(self):
+        return {
+            "ordered_units": self.ordered_units,
+            "returned_units": self.returned_units,
+            "matched_returns": self.matched_returns,
+            "return_rate": self.return_rate,
+            "refunded_amount": self.refunded_amount,
+            "skus": self.table.to_dict(orient="records"),
+        }
+
+
+class SkuJoin:
+    """Order and return rows keyed by shared SKU ids, built once per pair of reports.
+
+    Returns are also matched to order lines on (order id, SKU) when both
+    reports carry an order id, which shows how many of them trace back to an
+    order in the uploaded order report.
+    """
+
+    def __init__(self, orders, returns):
+        keys = KeyIndex()
+        self.order_sku = keys.encode(orders["sku"])
+        self.return_sku = keys.encode(returns["merchant sku"])
+        self.skus = keys.labels()
+
+        self.order_dates = orders["purchase-date"].to_numpy()
+        self.shipped = (orders["order-status"] != "Cancelled").to_numpy()
+        self.order_units = _units(orders.get("quantity"), len(orders))
+
+        self.return_dates = returns["order date"].to_numpy() if "order date" in returns.columns else None
+        self.return_units = _units(returns.get("return quantity"), len(returns))
+        self.refunded = (pd.to_numeric(returns["refunded amount"], errors="coerce").fillna(0).to_numpy(dtype=float)
+                         if "refunded amount" in returns.columns else np.zeros(len(returns)))
+        self.matched = self._match_order_lines(orders, returns)
+
+        # Product name per SKU from its last order line (later rows overwrite earlier ones)
+        self.products = np.full(len(self.skus), None, dtype=object)
+        if "product-name" in orders.columns:
+            valid = self.order_sku >= 0
+            self.products[self.order_sku[valid]] = orders["product-name"].to_numpy(dtype=object)[valid]
+
+    def _match_order_lines(self, orders, returns):
+        """Which return rows share an (order id, SKU) pair with some order line."""
+        if "amazon-order-id" not in orders.columns or "order id" not in returns.columns:
+            return np.zeros(len(returns), dtype=bool)
+        # One factorize over both sides; returns come first, so an order line
+        # whose id code is below the number of return ids has a return
+        codes, _ = pd.factorize(pd.concat([returns["order id"], orders["amazon-order-id"]], ignore_index=True))
+        return_ids, order_ids = codes[:len(returns)], codes[len(returns):]
+        returned = (order_ids >= 0) & (order_ids <= return_ids.max(initial=-1))
+
+        # One int64 key per (order id, SKU) pair, only for orders that have a return
+        width = max(len(self.skus), 1)
+        order_pairs = pd.Index(order_ids[returned].astype(np.int64) * width + self.order_sku[returned]).unique()
+        return_pairs = return_ids.astype(np.int64) * width + self.return_sku
+        found = order_pairs.get_indexer(return_pairs) >= 0
+        return found & (return_ids >= 0) & (self.return_sku >= 0)
+
+    def rates(self, start_date=None, end_date=None):
+        """Per-SKU ordered and returned units for orders placed in the window.
+
+        Returns are counted by their order date, so both sides cover the
+        same orders. Cancelled order lines are not counted as ordered units.
+        """
+        ordered = self.shipped & (self.order_sku >= 0)
+        returned = self.return_sku >= 0
+        if start_date is not None and end_date is not None:
+            ordered &= day_range_mask(self.order_dates, start_date, end_date)
+            if self.return_dates is not None:
+                returned &= day_range_mask(self.return_dates, start_date, end_date)
+
+        n = len(self.skus)
+        ordered_units = np.bincount(self.order_sku[ordered], weights=self.order_units[ordered], minlength=n)
+        returned_units = np.bincount(self.return_sku[returned], weights=self.return_units[returned], minlength=n)
+        matched = returned & self.matched
+        matched_units = np.bincount(self.return_sku[matched], weights=self.return_units[matched], minlength=n)
+        refunded = np.bincount(self.return_sku[returned], weights=self.refunded[returned], minlength=n)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(ordered_units > 0, returned_units / ordered_units, np.nan)
+        table = pd.DataFrame({
+            "SKU": self.skus,
+            "Product Name": self.products,
+            "Ordered Units": ordered_units.astype(np.int64),
+            "Returned Units": returned_units.astype(np.int64),
+            "Matched Returns": matched_units.astype(np.int64),
+            "Return Rate": rate,
+            "Refunded Amount": refunded,
+        })
+        table = table[(table["Ordered Units"] > 0) | (table["Returned Units"] > 0)]
+        table = table.sort_values(["Returned Units", "Ordered Units"], ascending=False, kind="stable").reset_index(drop=True)
+
+        return SkuReturnRates(
+            int(ordered_units.sum()),
+            int(returned_units.sum()),
+            int(matched_units.sum()),
+            float(refunded.sum()),
+            table,
+        )
+
+
+def cached_sku_join(order_file, return_file, orders, returns):
+    """Returns the join for a pair of uploads, building it on first use."""
+    key = (file_digest(order_file), file_digest(return_file), "sku-join")
+    join = join_cache.get(key)
+    if join is None:
+        with stage("join", rows=len(orders) + len(returns)):
+            join = SkuJoin(orders, returns)
+        join_cache.put(key, join)
+    return join
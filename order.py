@@ -1,82 +1,192 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+
+from analytics import ORDER_COLUMNS, ORDER_FILTER_COLUMNS, ORDER_LOAD_COLUMNS, clean_order_report, order_filter_spec, summarize_orders
+from categorical import column_memory_report, observed_values
+from charts import RESOLUTIONS, cached_figure, orders_over_time_figure, top_cities_figure
+from coerce import render_report
+from cube import cached_order_cube
+from export import export_panel
+from ingest import file_digest
+from instrument import stage
+from jobs import ingest_report
+from query import cached_engine, cached_filter_engine
+from store import DATA_SOURCES, ReportStore, available as store_available
+from streaming import cached_order_aggregates
+from upload import report_uploader
+
+def render_order_dashboard(summary, view_key):
+    """Displays the order KPIs, charts and top-N tables of an OrderSummary.
+
+    ``view_key`` identifies the data and filter selection the summary covers;
+    the charts are cached under it.
+    """
+    # Display Summary
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Orders", summary.total_orders)
+    col2.metric("Total Revenue", f"Rs.{summary.total_revenue:,.2f}")
+    col3.metric("Cancelled Orders", summary.cancelled_orders)
+
+    # Orders Over Time Chart (bucketed or downsampled server-side for long spans)
+    resolution = RESOLUTIONS[st.sidebar.selectbox("Chart Resolution", list(RESOLUTIONS))]
+    with stage("chart", rows=len(summary.orders_by_date)):
+        fig = cached_figure((view_key, "orders-over-time", resolution), orders_over_time_figure, summary.orders_by_date, resolution)
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Top Cities Chart
+    with stage("chart", rows=len(summary.top_cities)):
+        fig = cached_figure((view_key, "top-cities"), top_cities_figure, summary.top_cities)
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Top Selling Products
+    repeated_products = summary.top_products.reset_index()
+    repeated_products.columns = ["Product Name", "Purchase Count"]
+    st.markdown("### 🔥 Most Repeatedly Purchased Products")
+    st.dataframe(repeated_products)
+
+    # Top Selling SKUs
+    top_skus = summary.top_skus.reset_index()
+    top_skus.columns = ["SKU", "Order Count"]
+    st.markdown("### 🏆 Top Selling SKUs")
+    st.dataframe(top_skus)
+
+def process_order_stream(uploaded_file):
+    """Builds the order dashboard from chunked aggregates instead of a full DataFrame."""
+    # First pass collects the filter options along with the unfiltered aggregates
+    try:
+        profile = cached_order_aggregates(uploaded_file)
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    if profile.min_date is None:
+        st.warning("No records with a valid purchase date were found.")
+        return
+
+    # Sidebar Filters
+    st.sidebar.header("Filters")
+    statuses, channels = sorted(profile.statuses), sorted(profile.channels)
+    order_status = st.sidebar.multiselect("Order Status", statuses, default=statuses)
+    fulfillment_channel = st.sidebar.multiselect("Fulfillment Channel", channels, default=channels)
+
+    # Date Range Selection
+    min_date, max_date = profile.min_date.date(), profile.max_date.date()
+    date_range = st.sidebar.date_input("Select Date Range", [min_date, max_date])
+    start_date, end_date = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+
+    # Stream the file again only when the filters narrow the selection
+    aggregates = cached_order_aggregates(uploaded_file, order_status, fulfillment_channel, start_date, end_date)
+    if aggregates.total_orders == 0:
+        st.warning("No records found matching the selected filters.")
+        return
+
+    selection = (tuple(order_status), tuple(fulfillment_channel), start_date, end_date)
+    render_order_dashboard(aggregates.summary(), (file_digest(uploaded_file), "order-stream", selection))
+
+def load_order_store():
+    """Returns the stored order rows, cube, filter engine and window signature, or None."""
+    store = ReportStore("order")
+    months = store.months()
+    if not months:
+        st.info("The report store is empty. Upload an order report and merge it into the store first.")
+        return None
+
+    first, last = (st.sidebar.select_slider("Stored Months", options=months, value=(months[0], months[-1]))
+                   if len(months) > 1 else (months[0], months[0]))
+    window = months[months.index(first):months.index(last) + 1]
+    df = store.load(window, ORDER_COLUMNS)
+    signature = store.signature(window)
+    engine = cached_engine((signature, "order"), df, ORDER_FILTER_COLUMNS, ["purchase-date"])
+    return df, store.cube(window), engine, signature
+
+def merge_order_upload(uploaded_file):
+    """Merges every column of an uploaded order report into the report store."""
+    try:
+        stats = ReportStore("order").merge(ingest_report(uploaded_file, "order", clean_order_report))
+    except ValueError as e:
+        st.sidebar.error(str(e))
+        return
+    st.sidebar.success(
+        f"Merged {stats.added:,} new and {stats.updated:,} updated rows into {len(stats.months)} month(s); "
+        f"{stats.unchanged:,} unchanged, {stats.skipped:,} without a purchase date."
+    )
+
+def prepare_order_indexes(uploaded_file, df, build=True):
+    """Builds an upload's cube and filter engine; runs on the ingest worker unless both are cached."""
+    cube = cached_order_cube(uploaded_file, df, build)
+    engine = cached_filter_engine(uploaded_file, "order", df, ORDER_FILTER_COLUMNS, ["purchase-date"], build)
+    return None if cube is None or engine is None else (cube, engine)
 
 def process_order_report():
     # Streamlit App Title
     st.markdown("<h1 style='text-align: center; color: #4A90E2;'>📊 Amazon Order Report Dashboard</h1>", unsafe_allow_html=True)
 
-    # File Uploader
+    # Data Source: a fresh upload, or any window of the reports merged into the store so far
     st.sidebar.header("Upload Data")
-    uploaded_file = st.sidebar.file_uploader("Upload Amazon Order Report", type=["csv", "xlsx"])
-
-    if uploaded_file:
-        # Load Data
-        df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith(".csv") else pd.read_excel(uploaded_file)
-
-        # Ensure Required Columns Exist
-        required_columns = ["purchase-date", "order-status", "fulfillment-channel", "item-price", "ship-city", "sku", "product-name"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            st.error(f"Missing columns: {', '.join(missing_columns)}")
+    source = st.sidebar.radio("Data Source", DATA_SOURCES, horizontal=True) if store_available() else "Upload"
+    if source == "Report store":
+        loaded = load_order_store()
+        if loaded is None:
             return
-
-        # Convert Date Columns to Datetime and Remove Timezone
-        df["purchase-date"] = pd.to_datetime(df["purchase-date"], errors='coerce').dt.tz_localize(None)
-        df["last-updated-date"] = pd.to_datetime(df["last-updated-date"], errors='coerce').dt.tz_localize(None)
-
-        # Sidebar Filters
-        st.sidebar.header("Filters")
-        order_status = st.sidebar.multiselect("Order Status", df["order-status"].dropna().unique(), default=df["order-status"].dropna().unique())
-        fulfillment_channel = st.sidebar.multiselect("Fulfillment Channel", df["fulfillment-channel"].dropna().unique(), default=df["fulfillment-channel"].dropna().unique())
-
-        # Date Range Selection
-        min_date, max_date = df["purchase-date"].min().date(), df["purchase-date"].max().date()
-        date_range = st.sidebar.date_input("Select Date Range", [min_date, max_date])
-
-        start_date, end_date = pd.Timestamp(date_range[0]).tz_localize(None), pd.Timestamp(date_range[1]).tz_localize(None)
-
-        # Apply Filters
-        filtered_df = df[
-            df["order-status"].isin(order_status) &
-            df["fulfillment-channel"].isin(fulfillment_channel) &
-            df["purchase-date"].between(start_date, end_date)
-        ]
-
-        if filtered_df.empty:
-            st.warning("No records found matching the selected filters.")
+        df, cube, engine, source_key = loaded
+    else:
+        uploaded_file = report_uploader("Upload Amazon Order Report", "order")
+        if not uploaded_file:
             return
 
-        # Summary Metrics
-        total_orders = filtered_df.shape[0]
-        total_revenue = filtered_df["item-price"].sum()
-        cancelled_orders = filtered_df[filtered_df["order-status"] == "Cancelled"].shape[0]
-
-        # Display Summary
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Total Orders", total_orders)
-        col2.metric("Total Revenue", f"Rs.{total_revenue:,.2f}")
-        col3.metric("Cancelled Orders", cancelled_orders)
-
-        # Orders Over Time Chart
-        orders_by_date = filtered_df.groupby(filtered_df["purchase-date"].dt.date).size().reset_index(name="Orders")
-        fig = px.line(orders_by_date, x="purchase-date", y="Orders", title="📈 Orders Over Time", markers=True)
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Top Cities Chart
-        top_cities = filtered_df["ship-city"].value_counts().head(10).reset_index()
-        top_cities.columns = ["City", "Orders"]
-        fig = px.bar(top_cities, x="City", y="Orders", title="🌆 Top Shipping Cities", color="Orders", text_auto=True)
-        st.plotly_chart(fig, use_container_width=True)
+        # Oversized CSV exports can be aggregated chunk by chunk instead of loaded whole
+        if uploaded_file.name.endswith(".csv") and st.sidebar.checkbox("Streaming mode (large CSV)", help="Read the file in chunks; memory use is bounded by the chunk size."):
+            process_order_stream(uploaded_file)
+            return
 
-        # Top Selling Products
-        repeated_products = filtered_df["product-name"].value_counts().reset_index()
-        repeated_products.columns = ["Product Name", "Purchase Count"]
-        st.markdown("### 🔥 Most Repeatedly Purchased Products")
-        st.dataframe(repeated_products.head(10))
-
-        # Top Selling SKUs
-        top_skus = filtered_df["sku"].value_counts().reset_index()
-        top_skus.columns = ["SKU", "Order Count"]
-        st.markdown("### 🏆 Top Selling SKUs")
-        st.dataframe(top_skus.head(10))
+        # Load Data in the background (cached by file content across reruns, and
+        # shared with the SKU return rate page, which needs a few more columns)
+        try:
+            df, (cube, engine) = ingest_report(uploaded_file, "order", clean_order_report, ORDER_LOAD_COLUMNS, prepare_order_indexes)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        df = df[ORDER_COLUMNS]
+
+        if store_available() and st.sidebar.button("💾 Merge into report store"):
+            merge_order_upload(uploaded_file)
+        render_report(df)
+        source_key = file_digest(uploaded_file)
+
+    # Sidebar Filters
+    st.sidebar.header("Filters")
+    statuses, channels = observed_values(df["order-status"]), observed_values(df["fulfillment-channel"])
+    order_status = st.sidebar.multiselect("Order Status", statuses, default=statuses)
+    fulfillment_channel = st.sidebar.multiselect("Fulfillment Channel", channels, default=channels)
+
+    # Date Range Selection
+    min_date, max_date = df["purchase-date"].min().date(), df["purchase-date"].max().date()
+    date_range = st.sidebar.date_input("Select Date Range", [min_date, max_date])
+
+    start_date, end_date = pd.Timestamp(date_range[0]).tz_localize(None), pd.Timestamp(date_range[1]).tz_localize(None)
+
+    # Metrics and daily orders come from the cached cube; top-N rows from the bitmap indexes
+    summary = summarize_orders(df, order_status, fulfillment_channel, start_date, end_date, cube=cube, engine=engine)
+
+    if summary.total_orders == 0:
+        st.warning("No records found matching the selected filters.")
+        return
+
+    selection = (tuple(order_status), tuple(fulfillment_channel), start_date, end_date)
+    render_order_dashboard(summary, (source_key, "order", selection))
+
+    # Export the filtered rows; the selection is resolved only when a download is generated
+    kpis = {
+        "Total Orders": summary.total_orders,
+        "Total Revenue": round(summary.total_revenue, 2),
+        "Cancelled Orders": summary.cancelled_orders,
+        "Order Status": ", ".join(map(str, order_status)),
+        "Fulfillment Channel": ", ".join(map(str, fulfillment_channel)),
+        "Date Range": f"{start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}",
+    }
+    spec = order_filter_spec(order_status, fulfillment_channel, start_date, end_date)
+    export_panel(df, "order_report", kpis, rows=lambda: engine.rows(spec), key="order_export")
+
+    if st.sidebar.checkbox("Show memory per column"):
+        st.markdown("### 🧮 Memory per Column")
+        st.dataframe(column_memory_report(df))
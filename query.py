@@ -0,0 +1,177 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from ingest import ReportCache, file_digest
+from instrument import stage
+
+# (content digest, report kind) -> FilterEngine
+engine_cache = ReportCache(max_entries=16, spill_dir=None)
+
+# Combined (packed) bitmaps remembered per engine for repeated selections
+MAX_CACHED_MASKS = 64
+
+
+class BitmapIndex:
+    """One packed bitmap per distinct value of a column.
+
+    Bitmaps are built from the rows sorted by value code, so building costs a
+    single sort instead of one full scan per value.
+    """
+
+    def __init__(self, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, labels = pd.factorize(series)
+        self.size = len(codes)
+        self.labels = pd.Index(labels)
+        self.bitmaps = []
+
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(-1, len(labels) + 1))
+        # bounds[0]:bounds[1] are the missing values (code -1)
+        for code in range(len(labels)):
+            rows = np.zeros(self.size, dtype=bool)
+            rows[order[bounds[code + 1]:bounds[code + 2]]] = True
+            self.bitmaps.append(np.packbits(rows))
+
+        present = np.zeros(self.size, dtype=bool)
+        present[order[bounds[1]:]] = True
+        self.present = np.packbits(present)
+
+    def select(self, values):
+        """Returns the packed bitmap of rows whose value is in ``values``."""
+        codes = self.labels.get_indexer(list(values))
+        wanted = np.zeros(len(self.labels), dtype=bool)
+        wanted[codes[codes >= 0]] = True
+
+        # OR together whichever side of the selection has fewer bitmaps
+        if wanted.sum() <= len(wanted) // 2:
+            result = np.zeros_like(self.present)
+            for code in np.flatnonzero(wanted):
+                result |= self.bitmaps[code]
+            return result
+
+        excluded = np.zeros_like(self.present)
+        for code in np.flatnonzero(~wanted):
+            excluded |= self.bitmaps[code]
+        return self.present & ~excluded
+
+
+class DateIndex:
+    """Row positions sorted by date, for day-range lookups with binary search."""
+
+    def __init__(self, series):
+        values = series.to_numpy(dtype="datetime64[ns]")
+        valid = ~np.isnat(values)
+        self.size = len(values)
+        self.order = np.flatnonzero(valid)[np.argsort(values[valid], kind="stable")]
+        self.sorted_values = values[self.order]
+
+    def select(self, start_date, end_date):
+        """Returns the packed bitmap of rows on any day from ``start_date`` to ``end_date``."""
+        start = np.datetime64(pd.Timestamp(start_date).normalize(), "ns")
+        stop = np.datetime64(pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1), "ns")
+        lo, hi = np.searchsorted(self.sorted_values, [start, stop], side="left")
+        rows = np.zeros(self.size, dtype=bool)
+        rows[self.order[lo:hi]] = True
+        return np.packbits(rows)
+
+
+class FilterEngine:
+    """Compiles declarative filter specs into a single row mask over a report.
+
+    A spec maps a column to either a list of accepted values (a value column)
+    or a ``(start_date, end_date)`` pair (a date column). Columns that are
+    missing from the spec, or set to None, are not filtered. Per-column
+    bitmaps and combined bitmaps are memoized packed (one bit per row), so
+    repeated selections skip the index lookups. Engines are shared between
+    sessions, so the memos are guarded by a lock.
+    """
+
+    def __init__(self, df, value_columns=(), date_columns=()):
+        self.size = len(df)
+        self.indexes = {col: BitmapIndex(df[col]) for col in value_columns if col in df.columns}
+        self.indexes.update({col: DateIndex(df[col]) for col in date_columns if col in df.columns})
+        self._column_bitmaps = OrderedDict()
+        self._combined = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, memo, key, bitmap):
+        with self._lock:
+            memo[key] = bitmap
+            while len(memo) > MAX_CACHED_MASKS:
+                memo.popitem(last=False)
+
+    def _recall(self, memo, key):
+        with self._lock:
+            bitmap = memo.get(key)
+            if bitmap is not None:
+                memo.move_to_end(key)
+            return bitmap
+
+    def _column_bitmap(self, col, selection):
+        key = (col, selection)
+        bitmap = self._recall(self._column_bitmaps, key)
+        if bitmap is None:
+            index = self.indexes[col]
+            bitmap = index.select(*selection) if isinstance(index, DateIndex) else index.select(selection)
+            self._remember(self._column_bitmaps, key, bitmap)
+        return bitmap
+
+    def bitmap(self, spec):
+        """Returns the packed bitmap of the rows matching ``spec`` (None when nothing is filtered)."""
+        frozen = tuple(sorted(
+            (col, frozenset(selection) if not isinstance(selection, tuple) else selection)
+            for col, selection in spec.items()
+            if selection is not None and col in self.indexes
+        ))
+        if not frozen:
+            return None
+        combined = self._recall(self._combined, frozen)
+        if combined is None:
+            for col, selection in frozen:
+                bitmap = self._column_bitmap(col, selection)
+                combined = bitmap.copy() if combined is None else combined & bitmap
+            self._remember(self._combined, frozen, combined)
+        return combined
+
+    def mask(self, spec):
+        """Returns a boolean row mask for ``spec``, unpacked from its memoized bitmap."""
+        combined = self.bitmap(spec)
+        if combined is None:
+            return np.ones(self.size, dtype=bool)
+        return np.unpackbits(combined, count=self.size).view(bool)
+
+    def rows(self, spec):
+        """Returns the positions of the rows matching ``spec``."""
+        return np.flatnonzero(self.mask(spec))
+
+    def filter(self, df, spec):
+        """Returns the matching rows of ``df`` with a single take, without intermediate copies."""
+        return df.take(self.rows(spec))
+
+
+def cached_filter_engine(uploaded_file, kind, df, value_columns=(), date_columns=(), build=True):
+    """Returns the filter engine for an upload, building its indexes on first use."""
+    return cached_engine((file_digest(uploaded_file), kind), df, value_columns, date_columns, build)
+
+
+def cached_engine(key, df, value_columns=(), date_columns=(), build=True):
+    """Returns the filter engine cached under ``key``, building it from ``df`` on first use.
+
+    ``key`` must identify the frame's contents, e.g. an upload digest or a
+    report store window signature, plus the report kind. With ``build``
+    false a missing engine is not built and None is returned.
+    """
+    if not build:
+        return engine_cache.peek(key)
+    engine = engine_cache.get(key)
+    if engine is None:
+        with stage("build indexes", rows=len(df)):
+            engine = FilterEngine(df, value_columns, date_columns)
+        engine_cache.put(key, engine)
+    return engine
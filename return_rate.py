@@ -0,0 +1,77 @@
+import streamlit as st
+import pandas as pd
+
+from analytics import clean_order_report, clean_return_report
+from export import export_panel
+from grid import paginated_table
+from ingest import file_digest
+from jobs import start_ingest, wait_for
+from join import JOIN_ORDER_COLUMNS, JOIN_RETURN_COLUMNS, cached_sku_join
+from upload import report_uploader
+
+def process_return_rate_report():
+    st.markdown("<h2 style='text-align: center; color: #4A90E2;'>🔁 SKU Return Rate Dashboard</h2>", unsafe_allow_html=True)
+    st.write("Upload an order report and a return report covering the same period to compare returns with orders per SKU.")
+
+    # File Uploaders
+    st.sidebar.header("Upload Data")
+    order_file = report_uploader("Upload Amazon Order Report", "order", key="return_rate_orders")
+    return_file = report_uploader("Upload Amazon Return Report", "return", key="return_rate_returns")
+
+    if order_file and return_file:
+        # Both reports are parsed with the same columns as on their own pages, so
+        # each upload is parsed once whichever page opens it first; they load side by side
+        order_job = start_ingest(order_file, "order", clean_order_report, columns=JOIN_ORDER_COLUMNS)
+        return_job = start_ingest(return_file, "return", clean_return_report)
+        try:
+            orders = wait_for(order_job)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        returns = wait_for(return_job)
+        returns = returns[[col for col in JOIN_RETURN_COLUMNS if col in returns.columns]]
+        if "merchant sku" not in returns.columns:
+            st.error("Missing columns: merchant sku")
+            return
+
+        join = cached_sku_join(order_file, return_file, orders, returns)
+
+        # Date Filter (order date on both reports)
+        st.sidebar.header("Filters")
+        min_date, max_date = orders["purchase-date"].min().date(), orders["purchase-date"].max().date()
+        date_range = st.sidebar.date_input("Select Order Date Range", [min_date, max_date])
+        start_date, end_date = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[-1])
+
+        rates = join.rates(start_date, end_date)
+        if rates.ordered_units == 0 and rates.returned_units == 0:
+            st.warning("No records found matching the selected filters.")
+            return
+
+        # Summary Metrics
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Ordered Units", f"{rates.ordered_units:,}")
+        col2.metric("Returned Units", f"{rates.returned_units:,}")
+        col3.metric("Return Rate", f"{rates.return_rate:.1%}" if rates.return_rate is not None else "-")
+        col4.metric("Refunded Amount", f"Rs.{rates.refunded_amount:,.2f}")
+        col5.metric("Matched on Order ID", f"{rates.matched_returns:,}")
+
+        # Per-SKU table, paged and sorted server-side
+        st.markdown("### 📦 Return Rate by SKU")
+        min_units = st.sidebar.number_input("Minimum Ordered Units", min_value=0, value=0, step=1)
+        table = rates.table[rates.table["Ordered Units"] >= min_units] if min_units else rates.table
+        paginated_table(
+            table, "return_rate",
+            (file_digest(order_file), file_digest(return_file), "return-rate", start_date, end_date, min_units),
+            search_columns=["SKU"], page_size=50,
+        )
+
+        kpis = {
+            "Ordered Units": rates.ordered_units,
+            "Returned Units": rates.returned_units,
+            "Return Rate": round(rates.return_rate, 4) if rates.return_rate is not None else "-",
+            "Refunded Amount": round(rates.refunded_amount, 2),
+            "Matched on Order ID": rates.matched_returns,
+            "Order Date Range": f"{start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}",
+            "Minimum Ordered Units": min_units,
+        }
+        export_panel(table, "sku_return_rate", kpis, key="return_rate_export")
@@ -1,104 +1,168 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import datetime
 
+from analytics import RETURN_COLUMNS, RETURN_FILTER_COLUMNS, clean_return_report, return_filter_spec, summarize_returns
+from categorical import column_memory_report, observed_values
+from charts import RESOLUTIONS, cached_figure, returns_over_time_figure, top_reasons_figure
+from coerce import render_report
+from export import export_panel
+from grid import paginated_table
+from ingest import file_digest
+from instrument import stage
+from jobs import ingest_report
+from query import cached_engine
+from store import DATA_SOURCES, ReportStore, available as store_available
+from upload import report_uploader
+
+def load_return_store():
+    """Returns every stored column and the dashboard columns for a window of months, or None."""
+    store = ReportStore("return")
+    months = store.months()
+    if not months:
+        st.info("The report store is empty. Upload a return report and merge it into the store first.")
+        return None
+
+    first, last = (st.sidebar.select_slider("Stored Months", options=months, value=(months[0], months[-1]))
+                   if len(months) > 1 else (months[0], months[0]))
+    window = months[months.index(first):months.index(last) + 1]
+    raw_df = store.load(window)
+    return raw_df, raw_df[[col for col in RETURN_COLUMNS if col in raw_df.columns]], store.signature(window)
+
+def merge_return_upload(uploaded_file):
+    """Merges every column of an uploaded return report into the report store."""
+    try:
+        stats = ReportStore("return").merge(ingest_report(uploaded_file, "return", clean_return_report))
+    except ValueError as e:
+        st.sidebar.error(str(e))
+        return
+    st.sidebar.success(
+        f"Merged {stats.added:,} new and {stats.updated:,} updated rows into {len(stats.months)} month(s); "
+        f"{stats.unchanged:,} unchanged, {stats.skipped:,} without an order date."
+    )
+
+def prepare_return_indexes(uploaded_file, raw_df, build=True):
+    """Builds the filter engine the dashboard looks up for an upload; runs on the ingest worker unless cached."""
+    df = raw_df[[col for col in RETURN_COLUMNS if col in raw_df.columns]]
+    return cached_engine((file_digest(uploaded_file), "return"), df, RETURN_FILTER_COLUMNS, ["order date"], build)
+
 def process_return_report():
     st.markdown("<h2 style='text-align: center; color: #E24A4A;'>🔄 Amazon Return Report Dashboard</h2>", unsafe_allow_html=True)
 
-    # File Uploader
-    uploaded_file = st.sidebar.file_uploader("Upload Amazon Return Report", type=["csv", "xlsx"])
-
-    if uploaded_file:
-        # Read the file
-        if uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
-        
-        st.markdown("### 📋 Raw Data Preview")
-        st.dataframe(df.head())
-
-        # Standardize Column Names
-        df.columns = df.columns.str.strip().str.lower()
-
-        # Convert columns to datetime
-        date_columns = ["order date", "return request date", "return delivery date", "safet claim creation time"]
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-
-        # Convert numeric columns to appropriate types
-        numeric_columns = ["refunded amount", "order amount"]
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-
-        # Filters
-        st.sidebar.header("Filters")
-        return_status = df["return request status"].dropna().unique() if "return request status" in df.columns else []
-        return_reason = df["return reason"].dropna().unique() if "return reason" in df.columns else []
-
-        if return_status.any():
-            selected_status = st.sidebar.multiselect("Filter by Return Request Status", options=return_status, default=return_status)
-        if return_reason.any():
-            selected_reason = st.sidebar.multiselect("Filter by Return Reason", options=return_reason, default=return_reason)
-
-        # Date Filter
-        if "order date" in df.columns:
-            date_range = st.sidebar.date_input("Select Order Date Range", [df["order date"].min().date(), df["order date"].max().date()])
-            start_date, end_date = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
-        else:
-            start_date, end_date = None, None
-
-        # Apply Filters
-        filtered_df = df.copy()
-        if "return request status" in df.columns and selected_status:
-            filtered_df = filtered_df[filtered_df["return request status"].isin(selected_status)]
-        if "return reason" in df.columns and selected_reason:
-            filtered_df = filtered_df[filtered_df["return reason"].isin(selected_reason)]
-        if "order date" in df.columns and start_date and end_date:
-            filtered_df = filtered_df[filtered_df["order date"].between(start_date, end_date)]
-
-        st.markdown("### 🔍 Filtered Data Preview")
-        st.dataframe(filtered_df.head())
-
-        # Summary Metrics
-        total_returns = filtered_df.shape[0]
-        total_refunded_amount = filtered_df["refunded amount"].sum() if "refunded amount" in filtered_df.columns else 0
-        total_order_amount = filtered_df["order amount"].sum() if "order amount" in filtered_df.columns else 0
-
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Return Requests", total_returns)
-        with col2:
-            st.metric("Total Refunded Amount", f"Rs.{total_refunded_amount:,.2f}")
-        with col3:
-            st.metric("Total Order Amount", f"Rs.{total_order_amount:,.2f}")
-
-        # Returns Over Time Chart
-        if "return request date" in filtered_df.columns:
-            returns_by_date = filtered_df.groupby(filtered_df["return request date"].dt.date).size().reset_index(name="Returns")
-            fig = px.line(returns_by_date, x="return request date", y="Returns", title="📉 Return Requests Over Time", markers=True)
+    # Data Source: a fresh upload, or any window of the reports merged into the store so far
+    source = st.sidebar.radio("Data Source", DATA_SOURCES, horizontal=True) if store_available() else "Upload"
+    if source == "Report store":
+        loaded = load_return_store()
+        if loaded is None:
+            return
+        raw_df, df, source_key = loaded
+    else:
+        # File Uploader (the header is checked before the file is parsed)
+        uploaded_file = report_uploader("Upload Amazon Return Report", "return")
+        if not uploaded_file:
+            return
+
+        # Read and clean the file in the background (cached by file content across reruns)
+        raw_df, _ = ingest_report(uploaded_file, "return", clean_return_report, prepare=prepare_return_indexes)
+        df = raw_df[[col for col in RETURN_COLUMNS if col in raw_df.columns]]
+        source_key = file_digest(uploaded_file)
+        render_report(raw_df)
+
+        if store_available() and st.sidebar.button("💾 Merge into report store"):
+            merge_return_upload(uploaded_file)
+
+    # Both previews page server-side, so only the visible rows reach the browser
+    st.markdown("### 📋 Raw Data Preview")
+    paginated_table(raw_df, "return_raw", (source_key, "return-raw"), search_columns=["merchant sku", "asin"], page_size=25)
+
+    # Filters
+    st.sidebar.header("Filters")
+    return_status = observed_values(df["return request status"]) if "return request status" in df.columns else []
+    return_reason = observed_values(df["return reason"]) if "return reason" in df.columns else []
+
+    if return_status:
+        selected_status = st.sidebar.multiselect("Filter by Return Request Status", options=return_status, default=return_status)
+    if return_reason:
+        selected_reason = st.sidebar.multiselect("Filter by Return Reason", options=return_reason, default=return_reason)
+
+    # Date Filter
+    if "order date" in df.columns:
+        date_range = st.sidebar.date_input("Select Order Date Range", [df["order date"].min().date(), df["order date"].max().date()])
+        start_date, end_date = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+    else:
+        start_date, end_date = None, None
+
+    # Apply Filters in one pass over the bitmap indexes; an empty selection means no filter
+    engine = cached_engine((source_key, "return"), df, RETURN_FILTER_COLUMNS, ["order date"])
+    with stage("filter") as record:
+        rows = engine.rows(return_filter_spec(
+            selected_status if return_status else None,
+            selected_reason if return_reason else None,
+            start_date, end_date,
+        ))
+        filtered_df = df.take(rows)
+        record["rows"] = len(rows)
+
+    # The preview pages the matching positions of the unfiltered frame, so no copy is cached per selection
+    st.markdown("### 🔍 Filtered Data Preview")
+    selection = (
+        tuple(selected_status) if return_status else None,
+        tuple(selected_reason) if return_reason else None,
+        start_date, end_date,
+    )
+    paginated_table(df, "return_filtered", (source_key, "return-filtered"),
+                    search_columns=["merchant sku"], page_size=25, rows=rows, rows_key=selection)
+
+    # Summary Metrics
+    summary = summarize_returns(filtered_df)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Return Requests", summary.total_returns)
+    with col2:
+        st.metric("Total Refunded Amount", f"Rs.{summary.total_refunded_amount:,.2f}")
+    with col3:
+        st.metric("Total Order Amount", f"Rs.{summary.total_order_amount:,.2f}")
+
+    # Returns Over Time Chart (bucketed or downsampled server-side for long spans)
+    if summary.returns_by_date is not None:
+        resolution = RESOLUTIONS[st.sidebar.selectbox("Chart Resolution", list(RESOLUTIONS))]
+        with stage("chart", rows=len(summary.returns_by_date)):
+            fig = cached_figure((source_key, "returns-over-time", selection, resolution),
+                                returns_over_time_figure, summary.returns_by_date, resolution)
             st.plotly_chart(fig, use_container_width=True)
 
-        # Top Return Reasons
-        if "return reason" in filtered_df.columns:
-            top_reasons = filtered_df["return reason"].value_counts().reset_index()
-            top_reasons.columns = ["Return Reason", "Count"]
-            fig = px.bar(top_reasons.head(10), x="Return Reason", y="Count", title="🔝 Top Return Reasons", color="Count", text_auto=True)
+    # Top Return Reasons
+    if summary.top_reasons is not None:
+        with stage("chart", rows=len(summary.top_reasons)):
+            fig = cached_figure((source_key, "top-reasons", selection), top_reasons_figure, summary.top_reasons)
             st.plotly_chart(fig, use_container_width=True)
 
-        # Top Returned SKUs
-        if "merchant sku" in filtered_df.columns:
-            top_returned_skus = filtered_df["merchant sku"].value_counts().reset_index()
-            top_returned_skus.columns = ["SKU", "Return Count"]
-            st.markdown("### 🏆 Top Returned SKUs")
-            st.dataframe(top_returned_skus.head(10))
-
-        # Top Returned Product Names
-        if "item name" in filtered_df.columns:
-            top_returned_products = filtered_df["item name"].value_counts().reset_index()
-            top_returned_products.columns = ["Product Name", "Return Count"]
-            st.markdown("### 🔥 Most Frequently Returned Products")
-            st.dataframe(top_returned_products.head(10))
+    # Top Returned SKUs
+    if summary.top_skus is not None:
+        top_returned_skus = summary.top_skus.reset_index()
+        top_returned_skus.columns = ["SKU", "Return Count"]
+        st.markdown("### 🏆 Top Returned SKUs")
+        st.dataframe(top_returned_skus)
+
+    # Top Returned Product Names
+    if summary.top_products is not None:
+        top_returned_products = summary.top_products.reset_index()
+        top_returned_products.columns = ["Product Name", "Return Count"]
+        st.markdown("### 🔥 Most Frequently Returned Products")
+        st.dataframe(top_returned_products)
+
+    # Export the filtered rows with the KPIs above
+    kpis = {
+        "Total Return Requests": summary.total_returns,
+        "Total Refunded Amount": round(summary.total_refunded_amount, 2),
+        "Total Order Amount": round(summary.total_order_amount, 2),
+        "Return Request Status": ", ".join(map(str, selected_status)) if return_status else "All",
+        "Return Reason": ", ".join(map(str, selected_reason)) if return_reason else "All",
+        "Order Date Range": f"{start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}" if start_date is not None else "All",
+    }
+    export_panel(filtered_df, "return_report", kpis, key="return_export")
+
+    if st.sidebar.checkbox("Show memory per column"):
+        st.markdown("### 🧮 Memory per Column")
+        st.dataframe(column_memory_report(df))
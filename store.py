@@ -0,0 +1,186 @@
+"""Persistent report store that overlapping daily downloads are merged into.
+
+Cleaned order and return reports are kept as one Parquet file per month of
+their date column. A merge rewrites only the months an upload touches,
+keeping the latest version of each order line, and rebuilds those months'
+pre-aggregated order cube cells next to them. Dashboards then read just the
+months of the selected window.
+"""
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import columnar
+from categorical import encode_categoricals
+from cube import CUBE_DIMENSIONS, OrderCube
+from ingest import ReportCache
+from instrument import stage
+
+STORE_DIR = os.environ.get("DASHBOARD_STORE_DIR", "report_store")
+
+# kind -> (partition date column, columns identifying a record, column telling which version is newer).
+# Return reports have no last-updated column, so a re-uploaded return replaces the stored one.
+STORE_LAYOUT = {
+    "order": ("purchase-date", ["amazon-order-id", "sku"], "last-updated-date"),
+    "return": ("order date", ["order id", "merchant sku", "amazon rma id"], None),
+}
+
+# Where a dashboard's rows come from: a fresh upload or a window of stored months
+DATA_SOURCES = ["Upload", "Report store"]
+
+CUBE_COLUMNS = CUBE_DIMENSIONS + ["orders", "revenue", "cancelled"]
+
+PARTITION_PATTERN = re.compile(r"(\d{4}-\d{2})\.parquet")
+
+# (kind, window signature, columns) -> frame or OrderCube read from the store
+store_cache = ReportCache(max_entries=8, spill_dir=None)
+
+# Merges rewrite partitions, so only one runs at a time
+_merge_lock = threading.Lock()
+
+
+def available():
+    """Returns True when Parquet support (pyarrow) is installed."""
+    return columnar.pq is not None
+
+
+def _write_parquet(df, path):
+    columnar.write_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+
+
+@dataclass
+class MergeStats:
+    """What merging one upload changed in the store."""
+    rows: int = 0
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    months: list = field(default_factory=list)
+
+
+class ReportStore:
+    """Month partitions of one report kind under ``root/kind``."""
+
+    def __init__(self, kind, root=STORE_DIR):
+        if kind not in STORE_LAYOUT:
+            raise ValueError(f"No store layout for {kind} reports")
+        self.kind = kind
+        self.directory = os.path.join(root, kind)
+        self.date_column, self.key_columns, self.version_column = STORE_LAYOUT[kind]
+
+    def _path(self, month, suffix="parquet"):
+        return os.path.join(self.directory, f"{month}.{suffix}")
+
+    def months(self):
+        """Returns the stored months ("YYYY-MM"), oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(match.group(1) for match in map(PARTITION_PATTERN.fullmatch, os.listdir(self.directory)) if match)
+
+    def signature(self, months):
+        """Identifies the current contents of ``months``; changes whenever one is rewritten.
+
+        A merge writes a month's cube cells after its rows, so both files count.
+        """
+        paths = [self._path(month, suffix) for month in months for suffix in ("parquet", "cube.parquet")]
+        parts = [f"{os.path.basename(path)}:{os.stat(path).st_mtime_ns}" for path in paths if os.path.exists(path)]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+    def _latest(self, df):
+        """Keeps one row per record, the one with the newest version (the later row on ties)."""
+        if self.version_column is not None and self.version_column in df.columns:
+            df = df.sort_values(self.version_column, kind="stable", na_position="first")
+        return df.drop_duplicates(self.key_columns, keep="last")
+
+    def _count_updated(self, existing, upload):
+        """Upload rows that replace a stored record with a newer version.
+
+        Without a version column, a row only counts as an update when some
+        of its values differ from the stored record's.
+        """
+        if self.version_column is None:
+            columns = [col for col in upload.columns if col in existing.columns and col not in self.key_columns]
+            pairs = upload[self.key_columns + columns].merge(
+                existing[self.key_columns + columns], on=self.key_columns, suffixes=("", " stored"))
+            differs = np.zeros(len(pairs), dtype=bool)
+            for col in columns:
+                new, stored = pairs[col].astype(object), pairs[col + " stored"].astype(object)
+                same = (new == stored).to_numpy(dtype=bool) | (new.isna() & stored.isna()).to_numpy(dtype=bool)
+                differs |= ~same
+            return int(differs.sum())
+        if self.version_column not in existing.columns or self.version_column not in upload.columns:
+            return 0
+        columns = self.key_columns + [self.version_column]
+        pairs = upload[columns].merge(existing[columns], on=self.key_columns, suffixes=("", " stored"))
+        return int((pairs[self.version_column] > pairs[self.version_column + " stored"]).sum())
+
+    def merge(self, df):
+        """Merges a cleaned report into the store, rewriting only the months that changed.
+
+        Rows without a date cannot be placed in a month and are skipped.
+        """
+        missing = [col for col in [self.date_column] + self.key_columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+        # Partitions hold mixed-type columns as strings; match them so stored and uploaded values compare equal
+        dated = columnar.arrow_safe(df[df[self.date_column].notna()])
+        stats = MergeStats(rows=len(df), skipped=len(df) - len(dated))
+        months = dated[self.date_column].dt.strftime("%Y-%m").to_numpy()
+
+        with _merge_lock, stage("merge store", rows=len(df)):
+            os.makedirs(self.directory, exist_ok=True)
+            for month, upload in dated.groupby(months, sort=True):
+                upload = self._latest(upload)
+                path = self._path(month)
+                if os.path.exists(path):
+                    existing = pd.read_parquet(path)
+                    merged = self._latest(pd.concat([existing, upload], ignore_index=True))
+                    added, updated = len(merged) - len(existing), self._count_updated(existing, upload)
+                else:
+                    merged, added, updated = upload, len(upload), 0
+
+                stats.added += added
+                stats.updated += updated
+                stats.unchanged += len(upload) - added - updated
+                if not (added or updated):
+                    continue
+
+                # Concatenating partitions mixes category sets, so encode again before writing
+                merged = encode_categoricals(merged.reset_index(drop=True), self.kind)
+                _write_parquet(columnar.arrow_safe(merged), path)
+                if self.kind == "order":
+                    _write_parquet(OrderCube.build(merged).cells, self._path(month, "cube.parquet"))
+                stats.months.append(month)
+        return stats
+
+    def load(self, months, columns=None):
+        """Returns the stored rows of ``months``, reading only those partitions."""
+        key = (self.kind, self.signature(months), tuple(columns) if columns is not None else None)
+        df = store_cache.get(key)
+        if df is None:
+            with stage("read store") as record:
+                frames = [columnar.read_columns(self._path(month), columns) for month in months
+                          if os.path.exists(self._path(month))]
+                df = encode_categoricals(pd.concat(frames, ignore_index=True), self.kind) if frames else pd.DataFrame(columns=columns)
+                record["rows"] = len(df)
+            store_cache.put(key, df)
+        return df
+
+    def cube(self, months):
+        """Returns the order cube of ``months`` from the per-month cells kept by ``merge``."""
+        key = (self.kind, self.signature(months), "cube")
+        cube = store_cache.get(key)
+        if cube is None:
+            cells = [pd.read_parquet(self._path(month, "cube.parquet")) for month in months
+                     if os.path.exists(self._path(month, "cube.parquet"))]
+            # Months never share a day, so their cells concatenate without regrouping
+            cube = OrderCube(pd.concat(cells, ignore_index=True) if cells else pd.DataFrame(columns=CUBE_COLUMNS))
+            store_cache.put(key, cube)
+        return cube
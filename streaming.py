@@ -0,0 +1,185 @@
+import os
+
+import pandas as pd
+
+from analytics import ORDER_COLUMNS, TOP_N, OrderSummary
+from coerce import to_datetime
+from cube import day_range_mask
+from ingest import ReportCache, file_digest
+from instrument import stage
+
+# Rows per chunk when streaming; peak memory scales with this, not the file size
+CHUNK_SIZE = int(os.environ.get("DASHBOARD_CHUNK_SIZE", "100000"))
+
+# (digest, filter spec) -> OrderAggregates, so reruns with unchanged filters skip the file
+aggregate_cache = ReportCache(max_entries=32, spill_dir=None)
+
+
+def _add_counts(total, counts):
+    """Adds two value-count Series together, keeping integer counts."""
+    if total.empty:
+        return counts.astype("int64")
+    return total.add(counts, fill_value=0).astype("int64")
+
+
+def _top(counts, n):
+    return counts.sort_values(ascending=False, kind="stable").head(n)
+
+
+class OrderAggregates:
+    """Mergeable order KPIs and counters, folded in one chunk at a time.
+
+    The filter options (statuses, channels, date bounds) are collected from
+    every row, while the KPIs and counters only cover rows matching the
+    filters passed to ``update``.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.total_orders = 0
+        self.total_revenue = 0.0
+        self.cancelled_orders = 0
+        self.orders_by_date = pd.Series(dtype="int64")
+        self.city_counts = pd.Series(dtype="int64")
+        self.sku_counts = pd.Series(dtype="int64")
+        self.product_counts = pd.Series(dtype="int64")
+        self.statuses = set()
+        self.channels = set()
+        self.min_date = None
+        self.max_date = None
+        # Rows without a status, channel or date, which any filter selection excludes
+        self.incomplete = 0
+
+    def update(self, chunk, order_status=None, fulfillment_channel=None, start_date=None, end_date=None):
+        """Folds a cleaned chunk into the aggregates."""
+        self.rows += len(chunk)
+        self.statuses.update(chunk["order-status"].dropna().unique())
+        self.channels.update(chunk["fulfillment-channel"].dropna().unique())
+        chunk_min, chunk_max = chunk["purchase-date"].min(), chunk["purchase-date"].max()
+        if pd.notna(chunk_min):
+            self.min_date = chunk_min if self.min_date is None else min(self.min_date, chunk_min)
+            self.max_date = chunk_max if self.max_date is None else max(self.max_date, chunk_max)
+        self.incomplete += int(chunk[["order-status", "fulfillment-channel", "purchase-date"]].isna().any(axis=1).sum())
+
+        # Apply Filters
+        mask = pd.Series(True, index=chunk.index)
+        if order_status is not None:
+            mask &= chunk["order-status"].isin(order_status)
+        if fulfillment_channel is not None:
+            mask &= chunk["fulfillment-channel"].isin(fulfillment_channel)
+        if start_date is not None and end_date is not None:
+            mask &= day_range_mask(chunk["purchase-date"], start_date, end_date)
+        chunk = chunk[mask]
+
+        self.total_orders += len(chunk)
+        self.total_revenue += float(chunk["item-price"].sum())
+        self.cancelled_orders += int((chunk["order-status"] == "Cancelled").sum())
+        self.orders_by_date = _add_counts(self.orders_by_date, chunk["purchase-date"].dt.date.value_counts())
+        self.city_counts = _add_counts(self.city_counts, chunk["ship-city"].value_counts())
+        self.sku_counts = _add_counts(self.sku_counts, chunk["sku"].value_counts())
+        self.product_counts = _add_counts(self.product_counts, chunk["product-name"].value_counts())
+        return self
+
+    def merge(self, other):
+        """Folds another set of aggregates (e.g. from another file or worker) into this one."""
+        self.rows += other.rows
+        self.total_orders += other.total_orders
+        self.total_revenue += other.total_revenue
+        self.cancelled_orders += other.cancelled_orders
+        self.orders_by_date = _add_counts(self.orders_by_date, other.orders_by_date)
+        self.city_counts = _add_counts(self.city_counts, other.city_counts)
+        self.sku_counts = _add_counts(self.sku_counts, other.sku_counts)
+        self.product_counts = _add_counts(self.product_counts, other.product_counts)
+        self.statuses |= other.statuses
+        self.channels |= other.channels
+        self.incomplete += other.incomplete
+        for bound in [other.min_date, other.max_date]:
+            if bound is not None:
+                self.min_date = bound if self.min_date is None else min(self.min_date, bound)
+                self.max_date = bound if self.max_date is None else max(self.max_date, bound)
+        return self
+
+    def covers(self, order_status, fulfillment_channel, start_date, end_date):
+        """True when a selection keeps every row these unfiltered aggregates counted."""
+        if self.incomplete or self.min_date is None:
+            return False
+        return (
+            set(order_status) >= self.statuses
+            and set(fulfillment_channel) >= self.channels
+            and pd.Timestamp(start_date).normalize() <= self.min_date.normalize()
+            and pd.Timestamp(end_date).normalize() >= self.max_date.normalize()
+        )
+
+    def orders_over_time(self):
+        """Returns the daily order counts as a frame shaped like the row-level groupby."""
+        orders_by_date = self.orders_by_date.sort_index()
+        return pd.DataFrame({"purchase-date": orders_by_date.index, "Orders": orders_by_date.to_numpy()})
+
+    def summary(self, top=TOP_N):
+        """Returns the aggregates as the same OrderSummary the in-memory path produces."""
+        return OrderSummary(
+            self.total_orders,
+            self.total_revenue,
+            self.cancelled_orders,
+            self.orders_over_time(),
+            _top(self.city_counts, top),
+            _top(self.product_counts, top),
+            _top(self.sku_counts, top),
+        )
+
+
+def clean_order_chunk(chunk):
+    """Converts the date and price columns of a single CSV chunk."""
+    # The format inferred from the first chunk is cached for the rest
+    chunk["purchase-date"] = to_datetime(chunk["purchase-date"], naive=True)
+    chunk["item-price"] = pd.to_numeric(chunk["item-price"], errors='coerce')
+    return chunk
+
+
+def read_order_chunks(file, chunksize=CHUNK_SIZE):
+    """Yields cleaned chunks of an order CSV, reading only the dashboard columns."""
+    file.seek(0)
+    header = pd.read_csv(file, nrows=0).columns
+    file.seek(0)
+    missing_columns = [col for col in ORDER_COLUMNS if col not in header]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+
+    for chunk in pd.read_csv(file, usecols=ORDER_COLUMNS, chunksize=chunksize):
+        yield clean_order_chunk(chunk)
+
+
+def stream_order_aggregates(file, order_status=None, fulfillment_channel=None, start_date=None, end_date=None,
+                            chunksize=CHUNK_SIZE):
+    """Streams an order CSV once and returns its OrderAggregates for the given filters."""
+    aggregates = OrderAggregates()
+    for chunk in read_order_chunks(file, chunksize):
+        aggregates.update(chunk, order_status, fulfillment_channel, start_date, end_date)
+    file.seek(0)
+    return aggregates
+
+
+def cached_order_aggregates(uploaded_file, order_status=None, fulfillment_channel=None, start_date=None, end_date=None):
+    """Returns streamed aggregates for an upload, re-reading it only for unseen filters.
+
+    A selection of every status, channel and date reuses the unfiltered
+    aggregates, so the first render streams the file once.
+    """
+    if None not in (order_status, fulfillment_channel, start_date, end_date):
+        profile = aggregate_cache.get((file_digest(uploaded_file), (None, None, None, None)))
+        if profile is not None and profile.covers(order_status, fulfillment_channel, start_date, end_date):
+            return profile
+    spec = (
+        tuple(sorted(order_status)) if order_status is not None else None,
+        tuple(sorted(fulfillment_channel)) if fulfillment_channel is not None else None,
+        start_date,
+        end_date,
+    )
+    key = (file_digest(uploaded_file), spec)
+    aggregates = aggregate_cache.get(key)
+    if aggregates is None:
+        with stage("stream") as record:
+            aggregates = stream_order_aggregates(uploaded_file, order_status, fulfillment_channel, start_date, end_date)
+            record["rows"] = aggregates.rows
+        aggregate_cache.put(key, aggregates)
+    return aggregates
@@ -0,0 +1,259 @@
+"""Generate synthetic Amazon order, return and inventory reports for load testing.
+
+The column names, value formats and blank-cell quirks follow the real
+exports the dashboards read. Examples:
+    python synth.py --rows 1000000 --format csv -o synthetic/
+    python synth.py --kind return --rows 50000 --format xlsx -o synthetic/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ORDER_SCHEMA = [
+    "amazon-order-id", "merchant-order-id", "purchase-date", "last-updated-date", "order-status",
+    "fulfillment-channel", "sales-channel", "order-channel", "url", "ship-service-level", "product-name",
+    "sku", "asin", "item-status", "quantity", "currency", "item-price", "item-tax", "shipping-price",
+    "shipping-tax", "gift-wrap-price", "gift-wrap-tax", "item-promotion-discount", "ship-promotion-discount",
+    "ship-city", "ship-state", "ship-postal-code", "ship-country", "promotion-ids", "is-business-order",
+    "purchase-order-number", "price-designation", "is-iba ",
+]
+RETURN_SCHEMA = [
+    "Order ID", "Order date", "Return request date", "Return request status", "Amazon RMA ID", "Seller RMA ID",
+    "Label type", "Label cost", "Currency code", "Return carrier", "Tracking ID", "Label to be paid by",
+    "A-to-z claim", "Is prime", "ASIN", " Merchant SKU", "Item Name", "Return quantity", "Return reason",
+    "In policy", "Return type", "Resolution", "Invoice number", "Return delivery date", "Order Amount",
+    "Order quantity", "SafeT Action reason", "SafeT claim ID", "SafeT claim state", "SafeT claim creation time",
+    "SafeT claim reimbursement amount", "Refunded Amount", "Category",
+]
+INVENTORY_SCHEMA = [
+    "sku", "asin", "price", "quantity", "Business Price", "Quantity Price Type",
+    "Quantity Lower Bound 1", "Quantity Price 1", "Quantity Lower Bound 2", "Quantity Price 2",
+    "Quantity Lower Bound 3", "Quantity Price 3", "Quantity Lower Bound 4", "Quantity Price 4",
+    "Quantity Lower Bound 5", "Quantity Price 5", "Progressive Price Type",
+    "Progressive Lower Bound 1", "Progressive Price 1", "Progressive Lower Bound 2", "Progressive Price 2",
+    "Progressive Lower Bound 3", "Progressive Price 3",
+]
+
+# Excel sheets hold at most 1,048,576 rows including the header
+XLSX_MAX_ROWS = 1_048_575
+
+ORDER_STATUSES = ["Shipped - Delivered to Buyer", "Shipped", "Cancelled", "Shipped - Returned to Seller", "Pending", "Shipped - Returning to Seller"]
+ORDER_STATUS_WEIGHTS = [0.70, 0.08, 0.12, 0.05, 0.03, 0.02]
+CITIES = [
+    ("BENGALURU", "KARNATAKA", 560001), ("CHENNAI", "TAMIL NADU", 600001), ("HYDERABAD", "TELANGANA", 500001),
+    ("MUMBAI", "MAHARASHTRA", 400001), ("NEW DELHI", "DELHI", 110001), ("PUNE", "MAHARASHTRA", 411001),
+    ("KOLKATA", "WEST BENGAL", 700001), ("AHMEDABAD", "GUJARAT", 380001), ("JAIPUR", "RAJASTHAN", 302001),
+    ("LUCKNOW", "UTTAR PRADESH", 226001), ("COIMBATORE", "TAMIL NADU", 641001), ("KOCHI", "KERALA", 682001),
+    ("VISAKHAPATNAM", "ANDHRA PRADESH", 530001), ("ONGOLE", "ANDHRA PRADESH", 523001), ("INDORE", "MADHYA PRADESH", 452001),
+    ("BHOPAL", "MADHYA PRADESH", 462001), ("PATNA", "BIHAR", 800001), ("GUWAHATI", "ASSAM", 781001),
+    ("CHANDIGARH", "CHANDIGARH", 160001), ("MYSURU", "KARNATAKA", 570001),
+]
+COLORS = ["Purple Wine", "Royal Blue", "Crimson Red", "Peacock Eye", "Cosmic Blue", "Mocha Brown", "Forest Green",
+          "Wild Floral", "Midnight Black", "Dusty Rose", "Olive", "Mustard", "Teal", "Lavender", "Coral"]
+STYLES = ["Pregnancy Loungewear Perfect for Comfort, Style, and Nursing Ease",
+          "Zipless Maternity Loungewear - Comfortable Cotton-Blend for Pregnancy & Nursing",
+          "Printed Maternity Loungewear | Zipless Nursing Wear for Comfort & Style"]
+SIZES = ["S", "M", "L", "XL", "XXL", "3XL"]
+RETURN_REASONS = ["UND-UNKNOWN", "AMZ-PG-APP-TOO-LARGE", "CR-QUALITY_UNACCEPTABLE", "AMZ-PG-APP-TOO-SMALL",
+                  "DID_NOT_LIKE_COLOR", "CR-DEFECTIVE", "CR-UNWANTED_ITEM", "AMZ-PG-BAD-DESC"]
+RETURN_STATUSES = ["Approved", "Closed", "Pending", "Rejected"]
+
+
+def _zipf_choice(rng, n_values, size, a=1.2):
+    """Picks indexes in [0, n_values) with a long-tailed popularity, like real SKUs and cities."""
+    weights = 1.0 / np.arange(1, n_values + 1) ** a
+    return rng.choice(n_values, size=size, p=weights / weights.sum())
+
+
+def _random_ids(rng, size, prefix_low=402, prefix_high=409):
+    """Amazon-style order ids such as 406-4789611-7664347."""
+    prefix = rng.integers(prefix_low, prefix_high, size).astype(str)
+    middle = np.char.zfill(rng.integers(0, 10_000_000, size).astype(str), 7)
+    tail = np.char.zfill(rng.integers(0, 10_000_000, size).astype(str), 7)
+    return np.char.add(np.char.add(np.char.add(np.char.add(prefix, "-"), middle), "-"), tail)
+
+
+def _random_codes(rng, size, alphabet, length):
+    """Random fixed-length strings drawn from ``alphabet``, built without a Python loop."""
+    chars = np.asarray(list(alphabet))[rng.integers(0, len(alphabet), (size, length))]
+    return np.ascontiguousarray(chars).view(f"<U{length}").ravel()
+
+
+def _iso_utc(timestamps):
+    """Formats timestamps like 2025-01-31T16:51:12+00:00."""
+    return np.char.add(np.datetime_as_string(timestamps.to_numpy(dtype="datetime64[s]"), unit="s"), "+00:00")
+
+
+def make_catalog(n_products, rng):
+    """Returns a product catalog with sku, asin, product-name and price."""
+    color = rng.integers(0, len(COLORS), n_products)
+    style = rng.integers(0, len(STYLES), n_products)
+    size = np.arange(n_products) % len(SIZES)
+    names = [f"HAZEL'S WILLOW {COLORS[c]} {STYLES[s]}" for c, s in zip(color, style)]
+    skus = [f"{COLORS[c].upper().replace(' ', '_')}_{i // len(SIZES)}_{SIZES[z]}" for i, (c, z) in enumerate(zip(color, size))]
+    asins = np.char.add("B0", _random_codes(rng, n_products, "ABCDEFGHJKLMNPQRSTUVWXYZ0123456789", 8))
+    prices = rng.choice([380.0, 499.0, 599.0, 699.0, 714.29, 750.0, 799.0, 899.0, 1199.0], n_products)
+    return pd.DataFrame({"sku": skus, "asin": asins, "product-name": names, "price": prices})
+
+
+def generate_orders(n_rows, seed=0, start="2025-01-01", days=365, catalog=None):
+    """Generates an order report with ``n_rows`` line items."""
+    rng = np.random.default_rng(seed)
+    catalog = catalog if catalog is not None else make_catalog(max(50, n_rows // 500), rng)
+    product = _zipf_choice(rng, len(catalog), n_rows)
+    city = _zipf_choice(rng, len(CITIES), n_rows, a=0.9)
+    status = rng.choice(len(ORDER_STATUSES), n_rows, p=ORDER_STATUS_WEIGHTS)
+    cancelled = np.asarray(ORDER_STATUSES, dtype=object)[status] == "Cancelled"
+
+    purchased = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 86400, n_rows), unit="s")
+    updated = purchased + pd.to_timedelta(rng.integers(3600, 14 * 86400, n_rows), unit="s")
+    quantity = np.where(cancelled, 0, rng.choice([1, 1, 1, 1, 2, 3], n_rows))
+    price = np.where(cancelled, np.nan, catalog["price"].to_numpy()[product] * np.maximum(quantity, 1))
+    cities = np.asarray([c[0] for c in CITIES], dtype=object)
+    states = np.asarray([c[1] for c in CITIES], dtype=object)
+    postal = np.asarray([c[2] for c in CITIES])
+
+    df = pd.DataFrame({
+        "amazon-order-id": _random_ids(rng, n_rows),
+        "merchant-order-id": np.nan,
+        "purchase-date": _iso_utc(purchased),
+        "last-updated-date": _iso_utc(updated),
+        "order-status": np.asarray(ORDER_STATUSES, dtype=object)[status],
+        "fulfillment-channel": rng.choice(["Merchant", "Amazon"], n_rows, p=[0.8, 0.2]),
+        "sales-channel": "Amazon.in",
+        "order-channel": "WebsiteOrderChannel",
+        "url": np.nan,
+        "ship-service-level": rng.choice(["Standard", "Expedited"], n_rows, p=[0.9, 0.1]),
+        "product-name": catalog["product-name"].to_numpy()[product],
+        "sku": catalog["sku"].to_numpy()[product],
+        "asin": catalog["asin"].to_numpy()[product],
+        "item-status": np.where(cancelled, None, "Shipped"),
+        "quantity": quantity,
+        "currency": np.where(cancelled, None, "INR"),
+        "item-price": price,
+        "item-tax": np.round(price * 0.05 / 1.05, 2),
+        "shipping-price": np.where(rng.random(n_rows) < 0.1, 50.0, np.nan),
+        "shipping-tax": np.nan,
+        "gift-wrap-price": np.nan,
+        "gift-wrap-tax": np.nan,
+        "item-promotion-discount": np.where(rng.random(n_rows) < 0.15, np.round(price * 0.05, 2), np.nan),
+        "ship-promotion-discount": np.nan,
+        "ship-city": cities[city],
+        "ship-state": states[city],
+        "ship-postal-code": postal[city] + rng.integers(0, 99, n_rows),
+        "ship-country": "IN",
+        "promotion-ids": np.nan,
+        "is-business-order": rng.random(n_rows) < 0.02,
+        "purchase-order-number": np.nan,
+        "price-designation": np.nan,
+        "is-iba ": False,
+    })
+    return df[ORDER_SCHEMA]
+
+
+def generate_returns(n_rows, seed=1, start="2025-01-01", days=365, catalog=None):
+    """Generates a return report with ``n_rows`` return requests, blanks stored as ' ' like the real export."""
+    rng = np.random.default_rng(seed)
+    catalog = catalog if catalog is not None else make_catalog(max(50, n_rows // 100), rng)
+    product = _zipf_choice(rng, len(catalog), n_rows)
+    ordered = (pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n_rows), unit="D"))
+    requested = ordered + pd.to_timedelta(rng.integers(1, 15, n_rows), unit="D")
+    delivered = requested + pd.to_timedelta(rng.integers(2, 10, n_rows), unit="D")
+    has_delivery = rng.random(n_rows) < 0.6
+    quantity = rng.choice([1, 1, 1, 2, 3], n_rows)
+    amount = catalog["price"].to_numpy()[product] * quantity
+    refunded = rng.random(n_rows) < 0.4
+    blank = np.full(n_rows, " ", dtype=object)
+
+    df = pd.DataFrame({
+        "Order ID": _random_ids(rng, n_rows),
+        "Order date": ordered,
+        "Return request date": requested,
+        "Return request status": rng.choice(RETURN_STATUSES, n_rows, p=[0.85, 0.08, 0.05, 0.02]),
+        "Amazon RMA ID": np.char.add(np.char.add("D", _random_codes(rng, n_rows, "abcdefghijkXYZVW", 7)), "RRMA"),
+        "Seller RMA ID": blank,
+        "Label type": "AmazonPrePaidLabel",
+        "Label cost": rng.choice([0.0, 92.0, 138.0], n_rows),
+        "Currency code": "INR",
+        "Return carrier": "ATS",
+        "Tracking ID": rng.integers(300_000_000_000, 600_000_000_000, n_rows).astype(float),
+        "Label to be paid by": rng.choice(["Seller", "Not Computed"], n_rows, p=[0.8, 0.2]),
+        "A-to-z claim": "N",
+        "Is prime": "N",
+        "ASIN": catalog["asin"].to_numpy()[product],
+        " Merchant SKU": catalog["sku"].to_numpy()[product],
+        "Item Name": catalog["product-name"].to_numpy()[product],
+        "Return quantity": quantity.astype(float),
+        "Return reason": rng.choice(RETURN_REASONS, n_rows),
+        "In policy": "Y",
+        "Return type": rng.choice(["C-Returns", "Rejected", "Undelivered"], n_rows, p=[0.8, 0.1, 0.1]),
+        "Resolution": rng.choice(["StandardRefund", "RefundAtFirstScan"], n_rows),
+        "Invoice number": np.char.add("IN-", rng.integers(1, 100_000, n_rows).astype(str)),
+        "Return delivery date": np.where(has_delivery, delivered.astype(object), " "),
+        "Order Amount": np.where(has_delivery, amount.astype(object), " "),
+        "Order quantity": np.where(has_delivery, quantity.astype(object), " "),
+        "SafeT Action reason": blank,
+        "SafeT claim ID": blank,
+        "SafeT claim state": blank,
+        "SafeT claim creation time": blank,
+        "SafeT claim reimbursement amount": blank,
+        "Refunded Amount": np.where(refunded, amount.astype(object), " "),
+        "Category": "Apparel",
+    })
+    return df[RETURN_SCHEMA]
+
+
+def generate_inventory(n_rows, seed=2):
+    """Generates an inventory report with one row per SKU."""
+    rng = np.random.default_rng(seed)
+    catalog = make_catalog(n_rows, rng)
+    quantity = np.where(rng.random(n_rows) < 0.17, 0.0, rng.integers(1, 60, n_rows).astype(float))
+    df = pd.DataFrame({col: np.nan for col in INVENTORY_SCHEMA}, index=range(n_rows))
+    df["sku"] = catalog["sku"]
+    df["asin"] = catalog["asin"]
+    df["price"] = catalog["price"].round().astype(int)
+    df["quantity"] = quantity
+    df["Business Price"] = np.where(rng.random(n_rows) < 0.1, (df["price"] * 0.9).round(), np.nan)
+    return df[INVENTORY_SCHEMA]
+
+
+GENERATORS = {"order": generate_orders, "return": generate_returns, "inventory": generate_inventory}
+
+
+def write_report(df, path):
+    """Writes a generated report as CSV or xlsx, based on the file extension."""
+    if path.endswith(".xlsx"):
+        if len(df) > XLSX_MAX_ROWS:
+            raise ValueError(f"{len(df):,} rows do not fit in one Excel sheet (max {XLSX_MAX_ROWS:,}); use CSV")
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def generate_report(kind, n_rows, directory, fmt="csv", seed=0):
+    """Generates one report file and returns its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{kind}_{n_rows}.{fmt}")
+    write_report(GENERATORS[kind](n_rows, seed=seed), path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Amazon reports with the dashboard schemas.")
+    parser.add_argument("--kind", choices=sorted(GENERATORS), action="append", help="Report type (repeatable, default: all)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000], help="Row counts to generate")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("-o", "--output", default="synthetic", help="Output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for kind in args.kind or sorted(GENERATORS):
+        for n_rows in args.rows:
+            print(generate_report(kind, n_rows, args.output, args.format, args.seed))
+
+
+if __name__ == "__main__":
+    main()
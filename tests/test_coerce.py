@@ -0,0 +1,47 @@
+import warnings
+
+import pandas as pd
+
+import coerce
+
+
+def setup_function():
+    coerce._format_cache.clear()
+
+
+def test_cached_format_is_rechecked_for_opposite_day_order():
+    month_first = pd.DataFrame({"order date": ["01/31/2025", "02/15/2025", "03/20/2025", "12/25/2025"]})
+    day_first = pd.DataFrame({"order date": ["31/01/2025", "15/02/2025", "20/03/2025", "25/12/2025"]})
+
+    first = coerce.coerce_columns(month_first, dates=["order date"])
+    second = coerce.coerce_columns(day_first, dates=["order date"])
+
+    assert first[0]["format"] == "%m/%d/%Y"
+    assert second[0]["format"] == "%d/%m/%Y"
+    assert second[0]["coerced"] == 0
+    assert day_first["order date"].tolist() == month_first["order date"].tolist()
+
+
+def test_cached_format_is_reused_when_it_still_parses():
+    coerce.coerce_columns(pd.DataFrame({"order date": ["2025-01-31", "2025-02-15"]}), dates=["order date"])
+    key = ("order date", "0000-00-00")
+    assert coerce._format_cache[key] == ("%Y-%m-%d", None)
+
+    df = pd.DataFrame({"order date": ["2025-03-01", "2025-04-02"]})
+    report = coerce.coerce_columns(df, dates=["order date"])
+    assert report[0]["format"] == "%Y-%m-%d"
+    assert df["order date"].notna().all()
+
+
+def test_blank_date_columns_parse_without_format_warnings():
+    df = pd.DataFrame({
+        "safet claim creation time": [" ", " ", " "],
+        "return delivery date": [" ", pd.Timestamp("2025-01-20").to_pydatetime(), " "],
+    })
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        coerce.coerce_columns(df, dates=list(df.columns))
+
+    assert df["safet claim creation time"].isna().all()
+    assert df["return delivery date"].tolist()[1] == pd.Timestamp("2025-01-20")
+    assert df["return delivery date"].isna().sum() == 2
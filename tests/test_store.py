@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from analytics import clean_return_report
+from ingest import load_data
+from store import ReportStore
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "return_report.xlsx")
+
+
+@pytest.fixture(scope="module")
+def returns():
+    return clean_return_report(load_data(SAMPLE))
+
+
+def test_remerging_the_same_return_report_changes_nothing(tmp_path, returns):
+    store = ReportStore("return", root=str(tmp_path))
+    first = store.merge(returns)
+    months = store.months()
+    signature = store.signature(months)
+
+    second = store.merge(returns)
+
+    assert first.added == len(returns) - first.skipped
+    assert (second.added, second.updated, second.months) == (0, 0, [])
+    assert second.unchanged == first.added
+    assert store.signature(months) == signature
+
+
+def test_changed_return_counts_as_updated(tmp_path, returns):
+    store = ReportStore("return", root=str(tmp_path))
+    store.merge(returns)
+
+    changed = returns.copy()
+    row = changed["order date"].notna().to_numpy().nonzero()[0][0]
+    changed.loc[changed.index[row], "refunded amount"] = 12345.0
+
+    stats = store.merge(changed)
+
+    assert (stats.added, stats.updated) == (0, 1)
+    assert len(stats.months) == 1
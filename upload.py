@@ -0,0 +1,77 @@
+"""Report uploaders that check the header row before anything is parsed.
+
+A file uploaded to the wrong dashboard is recognized from its first row,
+handed over to the dashboard it belongs to, and never parsed on this one.
+The dashboard it is handed to claims it on its next run and keeps it, like
+a file in its own uploader, until the user uploads another file there or
+opens another page.
+"""
+import streamlit as st
+
+from analytics import detect_report_kind, missing_columns
+from ingest import read_header
+
+# Navigation label of the dashboard for each report kind (see app.py)
+PAGE_TITLES = {"order": "Order Report", "inventory": "Inventory Report", "return": "Return Report"}
+
+# Session state keys: the navigation radio, uploads waiting for another dashboard
+# (by kind), and routed uploads a dashboard is showing (by page and uploader)
+PAGE_KEY = "page"
+ROUTED_KEY = "routed_uploads"
+CLAIMED_KEY = "claimed_uploads"
+
+
+def _open_page(title):
+    st.session_state[PAGE_KEY] = title
+
+
+def release_routed(page):
+    """Drops the routed uploads claimed by dashboards other than ``page``, once the user has left them."""
+    claimed = st.session_state.get(CLAIMED_KEY)
+    if claimed:
+        for slot in [slot for slot in claimed if slot[0] != page]:
+            del claimed[slot]
+
+
+def report_uploader(label, kind, type=("csv", "xlsx"), sidebar=True, key=None):
+    """Returns an upload whose header matches ``kind``, or None.
+
+    With nothing uploaded here, a file that another dashboard routed to this
+    one is used instead. A file of another kind is routed to its dashboard,
+    with a button to go there.
+    """
+    container = st.sidebar if sidebar else st
+    uploaded_file = container.file_uploader(label, type=list(type), key=key)
+    routed = st.session_state.setdefault(ROUTED_KEY, {})
+    claimed = st.session_state.setdefault(CLAIMED_KEY, {})
+    slot = (st.session_state.get(PAGE_KEY), key or kind)
+    if uploaded_file is None:
+        if kind in routed:
+            claimed[slot] = routed.pop(kind)
+        uploaded_file = claimed.get(slot)
+        if uploaded_file is not None:
+            container.caption(f"📎 Using {uploaded_file.name}, routed here from another dashboard.")
+        return uploaded_file
+
+    # A file uploaded here replaces any routed one
+    routed.pop(kind, None)
+    claimed.pop(slot, None)
+
+    try:
+        header = read_header(uploaded_file)
+    except Exception as e:
+        st.error(f"⚠️ Could not read the file header: {e}")
+        return None
+
+    detected = detect_report_kind(header)
+    if detected is None or detected == kind:
+        missing = missing_columns(header, kind)
+        if missing:
+            st.error(f"Missing columns: {', '.join(missing)}")
+            return None
+        return uploaded_file
+
+    routed[detected] = uploaded_file
+    st.error(f"{uploaded_file.name} looks like a report for the {PAGE_TITLES[detected]} dashboard, not the {PAGE_TITLES[kind]} one.")
+    st.button(f"➡️ Open it in the {PAGE_TITLES[detected]} dashboard", on_click=_open_page, args=(PAGE_TITLES[detected],))
+    return None